@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# Microbenchmarks for EchoCore hot paths.
+#
+#   python -m bench.run_bench                 # run and compare with bench/baseline.json
+#   python -m bench.run_bench --save          # run and overwrite the baseline
+#   python -m bench.run_bench -k peers -t 0.3 # only matching benchmarks, 30% threshold
+#
+# Each benchmark reports the median time per operation over several repeats.
+# A result slower than baseline * (1 + threshold) is flagged and makes the run
+# exit non-zero. Benchmarks whose dependencies are missing are reported as skipped.
+import os, sys, json, time, shutil, argparse, tempfile, statistics, platform
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+
+BENCHES = []
+def bench(name, ops=1):
+    # ops: operations performed by one call of the returned function
+    def deco(fn): BENCHES.append((name, fn, ops)); return fn
+    return deco
+
+class Skip(Exception): pass
+
+# --- memory store ---
+@bench("memory.put_event", ops=200)
+def _b_put_event(tmp):
+    from modules.memory_store import MemoryStore
+    m = MemoryStore(os.path.join(tmp, "put.db"))
+    return lambda: [m.put_event("event", {"i": i, "text": "bench"}) for i in range(200)]
+
+@bench("memory.put_event_batched", ops=200)
+def _b_put_event_batched(tmp):
+    from modules.memory_store import MemoryStore
+    m = MemoryStore(os.path.join(tmp, "putb.db"), batched=True)
+    def run():
+        for i in range(200): m.put_event("event", {"i": i, "text": "bench"})
+        m.flush()
+    return run
+
+@bench("memory.pull_since_1000")
+def _b_pull_since(tmp):
+    from modules.memory_store import MemoryStore
+    m = MemoryStore(os.path.join(tmp, "pull.db"), batched=True)
+    for i in range(5000): m.put_event("event", {"i": i})
+    m.flush()
+    return lambda: m.pull_since("", limit=1000)
+
+# --- guardian ---
+@bench("guardian.sign_packet")
+def _b_sign(tmp):
+    from guardian.guardian_sign import sign_packet
+    payload = {"node": "abcd1234", "state": {"rho": 0.8, "chi": 0.6, "psi": 0.9}, "peers": [{"node_id": str(i)} for i in range(50)]}
+    return lambda: sign_packet(payload)
+
+@bench("guardian.verify_packet")
+def _b_verify(tmp):
+    from guardian.guardian_sign import sign_packet, verify_packet
+    payload = {"node": "abcd1234", "state": {"rho": 0.8, "chi": 0.6, "psi": 0.9}, "peers": [{"node_id": str(i)} for i in range(50)]}
+    pkt = {**payload, **sign_packet(payload)}
+    return lambda: verify_packet(pkt)
+
+@bench("guardian.entropy_guard_100k")
+def _b_entropy(tmp):
+    from guardian.entropy_guard import entropy_guard
+    code = "\n".join(f"def f{i}(x):\n    return x * {i} + {i % 7}" for i in range(2500))[:100000]
+    return lambda: entropy_guard({"code": code})
+
+# --- MHKSI ---
+@bench("mhksi.update", ops=1000)
+def _b_mhksi(tmp):
+    from modules.mhksi_engine import MHKSIEngine, MHKSIConfig
+    e = MHKSIEngine(MHKSIConfig())
+    return lambda: [e.update(0.8, 0.6, 0.9, 0.1, 0.6) for _ in range(1000)]
+
+# --- skills ---
+@bench("skills.update_skill_at_10k", ops=100)
+def _b_skills(tmp):
+    from modules.tiny_skill_memory import SkillStore
+    st = SkillStore(os.path.join(tmp, "skills.jsonl"), legacy_path=None, max_per_concept=10**6)
+    for i in range(10000): st.add(f"concept {i % 500}", f"rule {i}", i % 10 / 10)
+    return lambda: [st.add("graph theory", "edges and vertices", 0.5) for _ in range(100)]
+
+@bench("skills.query_skill_at_10k", ops=100)
+def _b_skills_q(tmp):
+    from modules.tiny_skill_memory import SkillStore
+    st = SkillStore(os.path.join(tmp, "skills_q.jsonl"), legacy_path=None)
+    for i in range(10000): st.add(f"concept {i % 500}", f"rule {i}", i % 10 / 10)
+    return lambda: [st.query(f"concept {i}") for i in range(100)]
+
+# --- peers ---
+def _peer_table(tmp, n=1000):
+    from modules.p2p_layer import PeerTable
+    t = PeerTable(os.path.join(tmp, f"peers_{n}.json"), flush_interval=0)
+    for i in range(n): t.update(f"n{i}", "active", "10.0.0.1", 5000 + i)
+    return t
+
+@bench("peers.load_peers_1k")
+def _b_load_peers(tmp):
+    t = _peer_table(tmp)
+    def run():
+        t.update("n1", "active")  # invalidate the snapshot so every call rebuilds it
+        return t.snapshot()
+    return run
+
+@bench("peers.update_peer_status_1k", ops=1000)
+def _b_update_peers(tmp):
+    t = _peer_table(tmp)
+    return lambda: [t.update(f"n{i}", "active") for i in range(1000)]
+
+@bench("peers.flush_1k")
+def _b_flush_peers(tmp):
+    t = _peer_table(tmp)
+    def run():
+        t._dirty = True; t.flush()
+    return run
+
+# --- HTTP ---
+@bench("http.ask")
+def _b_ask(tmp):
+    try:
+        import flask  # noqa: F401
+        import mhk_agi_v2
+    except ImportError as e:
+        raise Skip(str(e))
+    if not hasattr(mhk_agi_v2, "create_app"): raise Skip("mhk_agi_v2.create_app not available")
+    os.chdir(tmp)  # relative cache/db paths from the default config land in tmp; run() restores cwd
+    app = mhk_agi_v2.create_app({"OFFLINE_MODE": True, "FEATURE_P2P": False,
+                                 "MEM_DB_PATH": os.path.join(tmp, "memory.db")}, socketio=False)
+    client = app.test_client()
+    return lambda: client.post("/ask", json={"text": "2+2?"})
+
+def measure(fn, ops, min_time=0.2, repeats=5):
+    fn()  # warm-up
+    n = 1; t = 0.0
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n): fn()
+        t = time.perf_counter() - t0
+        if t >= min_time / repeats or n >= 1 << 20: break
+        n *= 2
+    samples = [t / n]
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        for _ in range(n): fn()
+        samples.append((time.perf_counter() - t0) / n)
+    return statistics.median(samples) / ops * 1e6  # microseconds per op
+
+def run(selected, min_time, repeats):
+    results = {}; cwd = os.getcwd()
+    for name, setup, ops in BENCHES:
+        if selected and not any(k in name for k in selected): continue
+        tmp = tempfile.mkdtemp(prefix="echo_bench_")
+        try:
+            fn = setup(tmp)
+            results[name] = {"us_per_op": round(measure(fn, ops, min_time, repeats), 3)}
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+        finally:
+            os.chdir(cwd); shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+def compare(results, baseline, threshold):
+    rows = []; regressed = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name, {})
+        if "us_per_op" not in r:
+            rows.append((name, "skipped", "", r.get("skipped", ""))); continue
+        if "us_per_op" not in b:
+            rows.append((name, f"{r['us_per_op']:.3f}", "", "new")); continue
+        ratio = r["us_per_op"] / b["us_per_op"] if b["us_per_op"] else 1.0
+        flag = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "ok")
+        if flag == "REGRESSION": regressed.append(name)
+        rows.append((name, f"{r['us_per_op']:.3f}", f"{b['us_per_op']:.3f}", f"{ratio:.2f}x {flag}"))
+    return rows, regressed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="EchoCore microbenchmarks")
+    ap.add_argument("-k", dest="only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    ap.add_argument("-t", "--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--min-time", type=float, default=0.2)
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+    results = run(args.only, args.min_time, args.repeats)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+    rows, regressed = compare(results, baseline, args.threshold)
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressed}))
+    else:
+        print(f"{'benchmark':32} {'us/op':>12} {'baseline':>12}  verdict")
+        for name, cur, base, verdict in rows: print(f"{name:32} {cur:>12} {base:>12}  {verdict}")
+    if args.save:
+        merged = dict(baseline.get("results", {})); merged.update({k: v for k, v in results.items() if "us_per_op" in v})
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 1 if regressed and not args.save else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,12 @@
-import hashlib, time, hmac, json
+import hashlib, time, hmac, json, threading
+from collections import OrderedDict
 from guardian.config import GUARDIAN_SECRET, SIGNATURE_TIMEOUT
+def _mac(body: str) -> str:
+    return hmac.new(GUARDIAN_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
 def sign_packet(data: dict) -> dict:
     ts = str(int(time.time()))
     body = json.dumps(data, sort_keys=True) + ts
-    sig = hmac.new(GUARDIAN_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
+    sig = _mac(body)
     return {"sig": sig, "ts": ts}
 def verify_packet(packet: dict) -> bool:
     try:
@@ -11,6 +14,39 @@ def verify_packet(packet: dict) -> bool:
         if abs(int(time.time()) - ts) > SIGNATURE_TIMEOUT: return False
         content = {k:v for k,v in packet.items() if k not in ("sig","ts")}
         body = json.dumps(content, sort_keys=True) + str(ts)
-        exp = hmac.new(GUARDIAN_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
+        exp = _mac(body)
         return hmac.compare_digest(exp, packet.get("sig",""))
     except Exception: return False
+
+class SignedPacket:
+    # Serialized and signed exactly once; `body` is the wire form sent to every peer
+    # and to the DHT. Same signature scheme as sign_packet, so verify_packet accepts it.
+    __slots__ = ("data", "ts", "sig", "body")
+    def __init__(self, data: dict):
+        canon = json.dumps(data, sort_keys=True)
+        self.data = data; self.ts = str(int(time.time())); self.sig = _mac(canon + self.ts)
+        tail = json.dumps({"sig": self.sig, "ts": self.ts})[1:]
+        self.body = (canon[:-1] + (", " if data else "") + tail).encode()
+    def as_dict(self) -> dict:
+        return {**self.data, "sig": self.sig, "ts": self.ts}
+
+class ReplayCache:
+    # LRU of verified (ts, sig): repeats (HTTP + DHT copies, replays) skip the HMAC.
+    # Failures are not cached, so a forged body reusing a valid (ts, sig) can't block the real one.
+    NEW, DUP, BAD = "new", "dup", "bad"
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize; self._seen = OrderedDict(); self._lock = threading.Lock()
+        self.stats = {"new": 0, "dup": 0, "bad": 0}
+    def check(self, packet: dict) -> str:
+        key = (str(packet.get("ts", "")), str(packet.get("sig", "")))
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key); self.stats["dup"] += 1; return self.DUP
+        if not verify_packet(packet):
+            with self._lock: self.stats["bad"] += 1
+            return self.BAD
+        with self._lock:
+            self._seen[key] = True
+            while len(self._seen) > self.maxsize: self._seen.popitem(last=False)
+            self.stats["new"] += 1
+        return self.NEW
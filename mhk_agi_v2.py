@@ -1,104 +1,89 @@
 #!/usr/bin/env python3
-import os, json, time, math, random, hashlib, threading, requests
+# EchoCore node. Importing this module has no side effects: create_app(config) builds
+# the Flask app around a Node whose subsystems are constructed on first use, and
+# Node.start() launches the background work (P2P, sync, agents, gossip).
+#   python mhk_agi_v2.py                    # run a node
+#   python mhk_agi_v2.py --profile-startup  # import/init time per subsystem, then exit
+import time
+_T0 = time.perf_counter()
+import os, sys, json, math, random, hashlib, threading, atexit, importlib, argparse, types
 from datetime import datetime
-from flask import Flask, request, jsonify, send_from_directory
-from flask_socketio import SocketIO
-from rich.console import Console
-from sympy import sympify, N
-
-from echo_mind.fractal_mind import compose_entry
-from modules.tiny_skill_memory import update_skill
-from modules.human_tutor import record_turn
-from modules.core_long_memory import store_long_term, query_long_term
-from modules.persona_manager import get_context, save_personas, load_personas
-from modules.agent_local_embodiment import read_fake_sensor
-from modules.apply_wings import apply_wings
-from modules.agent_core import Agent
-from modules.goal_stack import push_goal, planner, generate_goal_from_summary
-from modules.gpt_mutator import mutate
-from modules.signature_core import sign_state, verify_signature
-from modules.resource_monitor import monitor_resources
+from flask import Flask, Blueprint, current_app, request, jsonify, send_from_directory
+
+from modules.persona_manager import load_personas
 from modules.error_logger import log_error
-from modules.translator import translate
 from modules.agent_web_ops import fetch_wikipedia
+from modules.state_store import StateStore
+from modules.affect_engine import AffectEngine
+from guardian.guardian_sign import sign_packet, verify_packet
+_IMPORT_MS = (time.perf_counter() - _T0) * 1e3
 
-from modules.p2p_layer import P2PLayer, load_peers, update_peer_status, cleanup_peers, KADEMLIA_AVAILABLE
-from modules.p2p_message_router import P2PMessageRouter
+CONFIG_PATH = "config/config.json"
+DEFAULTS = {"FEATURE_MEM_SYNC":True,"FEATURE_INITIATIVE":True,"FEATURE_AFFECT":True,"FEATURE_P2P":True,
+            "MEM_DB_PATH":"memory.db","MEM_SYNC_INTERVAL":120,
+            "INITIATIVE_COOLDOWN_SEC":600,"INITIATIVE_HIGH":0.7,"INITIATIVE_MED":0.4,
+            "AFFECT_STYLE":"auto","MEM_BATCH_WRITES":True,"MEM_FLUSH_INTERVAL_MS":500,"MEM_FLUSH_SIZE":256,
+            "MEM_RETENTION_DAYS":30,"MEM_ARCHIVE_DIR":"memory_archive","MEM_COMPACT_INTERVAL":3600,
+            "MEM_COMPACT_BATCH":500,"MEM_VACUUM_HOURS":24,"SCHED_WORKERS":6,
+            "SKILLS_PATH":"skills.jsonl","PEERS_PATH":"peers.json",
+            "MATH_TIMEOUT_S":2.0,"MATH_CACHE_SIZE":1024,
+            "WEB_CACHE_PATH":"web_cache.db","WEB_CACHE_TTL_S":86400,"WEB_CACHE_MAX":5000,
+            "TRANSLATE_CACHE_SIZE":4096,"TRANSLATE_CACHE_PATH":"translations.db",
+            "ASK_BUDGET_MS":1500,"ASK_MIN_SCORE":0.1,"ASK_MIN_BUDGET_MS":50,"ASK_MAX_BUDGET_MS":10000,"ASK_WORKERS":8,"AFFECT_BROADCAST_MS":2000,"BROADCAST_LEGACY":True,
+            "MHKSI_EVENT_INTERVAL_S":60,
+            "MY_PORT":5000,"GOSSIP_INTERVAL":60,"P2P_HOST":"0.0.0.0","P2P_PORT":8468,"P2P_BOOTSTRAP":[],
+            "LANG":"en","OFFLINE_MODE":False,"GOSSIP_WORKERS":16,"GOSSIP_PEER_TIMEOUT":3.0,
+            "GOSSIP_ROUND_DEADLINE":10.0,
+            "GOSSIP_MODE":"epidemic",   # "epidemic" (k random peers) or "broadcast" (all peers)
+            "GOSSIP_FANOUT":3,
+            "GOSSIP_COMPAT":False}      # also send full state + signature for proto-1 peers
+_ENV = {"MY_PORT": int, "GOSSIP_INTERVAL": int, "P2P_HOST": str, "P2P_PORT": int,
+        "P2P_BOOTSTRAP": lambda v: [p for p in v.split(",") if p], "LANG": str,
+        "OFFLINE_MODE": lambda v: v.lower()=="true", "GOSSIP_WORKERS": int, "GOSSIP_PEER_TIMEOUT": float,
+        "GOSSIP_ROUND_DEADLINE": float, "GOSSIP_MODE": str, "GOSSIP_FANOUT": int,
+        "GOSSIP_COMPAT": lambda v: v.lower()=="true"}
 
-from modules.memory_store import MemoryStore
-from modules.memory_sync import MemorySync
-from modules.initiative import Initiative
-from modules.affect_engine import AffectEngine
-from modules.mhksi_engine import MHKSIEngine, MHKSIConfig
+def load_config(path=CONFIG_PATH, overrides=None):
+    # defaults < config file < environment < overrides
+    conf = dict(DEFAULTS)
+    try: conf.update(json.load(open(path)))
+    except Exception: pass
+    conf.update({k: parse(os.environ[k]) for k, parse in _ENV.items() if os.environ.get(k)})
+    conf.update(overrides or {})
+    return conf
 
-from guardian.guardian_sign import sign_packet, verify_packet
-from guardian.reputation_shield import get_reputation, update_reputation
-from guardian.entropy_guard import entropy_guard
-from guardian.quarantine import quarantine_exec
-
-app = Flask(__name__, static_folder="static")
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
-console = Console()
-
-# --- Config ---
-NODE_ID = hashlib.sha256(os.urandom(16)).hexdigest()[:8]
-MY_PORT = int(os.getenv("MY_PORT", 5000))
-GOSSIP_INTERVAL = int(os.getenv("GOSSIP_INTERVAL", 60))
-P2P_HOST = os.getenv("P2P_HOST", "0.0.0.0")
-P2P_PORT = int(os.getenv("P2P_PORT", 8468))
-P2P_BOOTSTRAP = [(p.split(":")[0], int(p.split(":")[1])) for p in os.getenv("P2P_BOOTSTRAP","").split(",") if p]
-current_lang = os.getenv("LANG", "en")
-OFFLINE_MODE = os.getenv("OFFLINE_MODE","false").lower()=="true"
-
-# Feature flags from config
-FEATURE_P2P = True
-try:
-    cfg0 = json.load(open("config/config.json"))
-    FEATURE_P2P = cfg0.get("FEATURE_P2P", True)
-except Exception:
-    pass
-if not KADEMLIA_AVAILABLE:
-    FEATURE_P2P = False
-
-state = {"rho":0.8,"chi":0.6,"psi":0.9,"version":2.6,"hash":hashlib.sha256(b'init').hexdigest(),"node_id":NODE_ID}
-agi_metrics = {"skills_new":0,"goals_achieved":0,"self_lines":0,"response_time":0,"interactions":0}
-SKILL_FILE="skills.json"
-
-# --- P2P (optional) ---
-if FEATURE_P2P:
-    p2p_layer = P2PLayer(P2P_HOST, P2P_PORT, P2P_BOOTSTRAP, NODE_ID)
-    p2p_router = P2PMessageRouter(p2p_layer)
-    threading.Thread(target=p2p_layer.run, daemon=True).start()
-else:
-    p2p_layer = None
-    p2p_router = None
-
-# --- v2.6 add-ons ---
-conf = {"FEATURE_MEM_SYNC":True,"FEATURE_INITIATIVE":True,"FEATURE_AFFECT":True,
-        "MEM_DB_PATH":"memory.db","MEM_SYNC_INTERVAL":120,
-        "INITIATIVE_COOLDOWN_SEC":600,"INITIATIVE_HIGH":0.7,"INITIATIVE_MED":0.4,
-        "AFFECT_STYLE":"auto"}
-try:
-    conf.update(json.load(open("config/config.json")))
-except Exception: pass
-
-mem = MemoryStore(conf.get("MEM_DB_PATH","memory.db"))
-sync = MemorySync(mem, interval=conf.get("MEM_SYNC_INTERVAL",120), p2p_router=p2p_router)
-if conf.get("FEATURE_MEM_SYNC", True): sync.start()
-
-initiative = Initiative(conf)
-if conf.get("FEATURE_INITIATIVE", True):
-    initiative.start(get_state=lambda: state, record_event=lambda et,pl: mem.put_event(et,pl, signer=lambda d:'sig'))
-
-affect = AffectEngine(conf.get("AFFECT_STYLE","auto"))
-mhksi = MHKSIEngine(MHKSIConfig())
+def subsystem(*modules):
+    # A lazily built Node attribute. First access imports `modules`, runs the builder
+    # and records both times (exclusive of nested subsystems) in node.timings.
+    def deco(fn):
+        name = fn.__name__
+        def get(self):
+            if name in self._built: return self._built[name]
+            with self._lock:
+                if name not in self._built:
+                    t0 = time.perf_counter(); self._nested.append(0.0)
+                    try:
+                        for m in modules: importlib.import_module(m)
+                        t1 = time.perf_counter(); imp = t1 - t0 - self._nested[-1]; self._nested[-1] = 0.0
+                        self._built[name] = fn(self)
+                    finally:
+                        t2 = time.perf_counter(); inner = self._nested.pop()
+                        if self._nested: self._nested[-1] += t2 - t0
+                    self.timings[name] = {"import_ms": round(imp*1e3, 2), "init_ms": round((t2-t1-inner)*1e3, 2)}
+            return self._built[name]
+        return property(get, doc=fn.__doc__)
+    return deco
+
+SUBSYSTEMS = ("scheduler", "mem", "skills", "peers", "search", "sync", "compactor", "p2p", "gossip", "mhksi", "math", "web", "translator", "ask", "broadcaster", "initiative", "agents")
 
 def estimate_presence_density() -> float:
     return 0.6
 
-def estimate_network_curvature() -> float:
+def estimate_network_curvature(peers=None) -> float:
     try:
-        peers = load_peers()
+        if peers is None:
+            from modules.p2p_layer import load_peers
+            peers = load_peers()
         actives = sum(1 for p in peers if p.get("status")=="active")
         return 0.0 if actives == 0 else min(1.0, max(-1.0, (actives % 10)/10.0 - 0.5))
     except Exception:
@@ -111,143 +96,446 @@ def mhksi_core(psi, rho, chi, m_eff):
     except Exception as e:
         log_error("MHKSI", e); return rho*math.log1p(abs(psi)) + chi*(m_eff**2) + rho*chi*m_eff
 
-def gossip_state():
-    while True:
-        try:
-            peers = load_peers()
-            active = [p for p in peers if p.get("status")=="active"]
-            inactive = [p for p in peers if p.get("status")=="inactive"]
-            skills_hash = json.load(open(SKILL_FILE)) if os.path.exists(SKILL_FILE) else None
-            payload = {"node":NODE_ID,"state":state,"skills_hash":skills_hash,"signature":sign_state(state),"peers":active}
-            packet = {**payload, **sign_packet(payload)}
-            # HTTP fanout (only if we have peers with host/port known)
-            for peer in active:
-                try:
-                    res = requests.post(f"http://{peer['host']}:{peer['port']}/gossip", json=packet, timeout=3)
-                    if res.status_code==200: update_peer_status(peer["node_id"],"active")
-                    else: update_peer_status(peer["node_id"],"inactive")
-                except Exception: update_peer_status(peer["node_id"],"inactive")
-            # P2P DHT message (if enabled)
-            if p2p_router:
-                p2p_router.send_message(f"gossip_{NODE_ID}", packet)
-            # Update MHKSI & emit
-            s = estimate_presence_density()
-            tau = estimate_network_curvature()
-            res = mhksi.update(state["rho"], state["chi"], state["psi"], tau, s)
-            socketio.emit("mhksi_state", {"M": res["M"], "mode": res["mode"], "instant": res["instant"]})
-            cleanup_peers(30)
-            time.sleep(GOSSIP_INTERVAL)
-        except Exception as e:
-            log_error("GossipLoop", e); time.sleep(GOSSIP_INTERVAL)
-
-# --- Agents ---
-def web_explorer():
-    if OFFLINE_MODE: return {"agent":"WebExplorer","offline":True}
-    topic = random.choice(["neuroplasticity","graph theory","cybernetics"])
-    data = fetch_wikipedia(topic)
-    if data and "text" in data:
-        txt = translate(data["text"], current_lang)
-        update_skill(topic, txt, 0.5); record_turn(topic, txt, 0.5, None)
-        agi_metrics["skills_new"] += 1
-        mem.put_event("knowledge", {"topic":topic})
-        return {"agent":"WebExplorer","topic":topic}
-    return {"agent":"WebExplorer","topic":topic,"bytes":0}
-
-def code_mutator():
-    prompt = random.choice(["Optimize memory usage","Add /peers improvements","Refactor planner"])
-    new_code = mutate(prompt)
-    if not entropy_guard({"code":new_code}): return {"agent":"CodeMutator","error":"low entropy"}
-    ok, out = quarantine_exec(new_code)
-    if ok:
-        mem.put_event("self_patch", {"lines": len(new_code.splitlines())})
-        agi_metrics["self_lines"] += len(new_code.splitlines())
-    return {"agent":"CodeMutator","ok":ok}
-
-def daily_reflection():
-    new_goal = generate_goal_from_summary("...", lang=current_lang)
-    push_goal(new_goal, priority=0.9)
-    agi_metrics["goals_achieved"] += 1
-    mem.put_event("reflection", {"goal": new_goal})
-    return {"agent":"Reflector","new_goal":new_goal}
-
-Agent("WebExplorer", web_explorer, interval=300).start()
-Agent("CodeMutator", code_mutator, interval=300).start()
-Agent("Reflector", daily_reflection, interval=3600).start()
-Agent("Planner", lambda: True, interval=300).start()
-Agent("ResourceMonitor", monitor_resources, interval=60).start()
+class Node:
+    def __init__(self, conf):
+        self.conf = conf
+        self.node_id = hashlib.sha256(os.urandom(16)).hexdigest()[:8]
+        self.lang = conf["LANG"]; self.offline = bool(conf["OFFLINE_MODE"])
+        self.state = StateStore({"rho":0.8,"chi":0.6,"psi":0.9,"version":2.6,"hash":hashlib.sha256(b'init').hexdigest(),"node_id":self.node_id})
+        self.agi_metrics = {"skills_new":0,"goals_achieved":0,"self_lines":0,"response_time":0,"interactions":0}
+        self.affect = AffectEngine(conf.get("AFFECT_STYLE","auto"))
+        self.socketio = None
+        self._built = {}; self._lock = threading.RLock(); self._nested = []; self.timings = {}
+        self._mhksi_inputs = None; self._mhksi_lock = threading.Lock(); self._mhksi_logged = (float("-inf"), None)
+        self.started = False
+
+    def emit(self, event, data):
+        # coalesced, at most every AFFECT_BROADCAST_MS: deltas to subscribers, full payloads to legacy clients
+        if self.socketio is not None: self.broadcaster.publish(event, data)
+
+    @property
+    def p2p_enabled(self):
+        from modules.p2p_layer import KADEMLIA_AVAILABLE
+        return bool(self.conf.get("FEATURE_P2P", True)) and KADEMLIA_AVAILABLE
+
+    # --- subsystems ---
+    # Each Node builds its own from its config; the module-level get_*() singletons are only for the legacy function API.
+    @subsystem("modules.scheduler")
+    def scheduler(self):
+        from modules.scheduler import Scheduler
+        s = Scheduler(int(self.conf.get("SCHED_WORKERS",6)))  # runs every periodic job
+        atexit.register(s.shutdown); return s
+
+    @subsystem("modules.memory_store")
+    def mem(self):
+        from modules.memory_store import MemoryStore
+        c = self.conf
+        m = MemoryStore(c.get("MEM_DB_PATH","memory.db"), batched=c.get("MEM_BATCH_WRITES", True),
+                        flush_interval=c.get("MEM_FLUSH_INTERVAL_MS",500)/1000.0, flush_size=c.get("MEM_FLUSH_SIZE",256))
+        atexit.register(m.close); return m
+
+    @subsystem("modules.tiny_skill_memory")
+    def skills(self):
+        from modules.tiny_skill_memory import SkillStore
+        path = self.conf.get("SKILLS_PATH","skills.jsonl")
+        return SkillStore(path, legacy_path=os.path.join(os.path.dirname(path), "skills.json"))
+
+    @subsystem("modules.p2p_layer")
+    def peers(self):
+        from modules.p2p_layer import PeerTable
+        p = PeerTable(self.conf.get("PEERS_PATH","peers.json"))
+        atexit.register(p.flush); return p
+
+    @subsystem("modules.search_index", "modules.core_long_memory", "modules.human_tutor")
+    def search(self):
+        from modules.search_index import SearchIndex
+        from modules.core_long_memory import attach as attach_long_term
+        from modules.human_tutor import add_sink as add_tutor_sink
+        idx = SearchIndex(self.mem); skills = self.skills
+        idx.attach_skills(skills)
+        attach_long_term(idx)
+        def index_turn(q, a, score, corr):
+            if any(r["rule"] == a for r in skills.query(q, 1)): return  # e.g. WebExplorer: already indexed as a skill
+            idx.add("tutor", q, f"{q} {a}")
+        add_tutor_sink(index_turn)
+        return idx
+
+    @subsystem("requests", "modules.memory_sync")
+    def sync(self):
+        import requests
+        from modules.memory_sync import MemorySync
+        def post(peer, msg):
+            r = requests.post(f"http://{peer['host']}:{peer['port']}/memsync", json={**msg, **sign_packet(msg)}, timeout=10)
+            r.raise_for_status(); return r.json()
+        c = self.conf
+        return MemorySync(self.mem, interval=c.get("MEM_SYNC_INTERVAL",120), p2p_router=self.p2p.router,
+                          get_peers=lambda: [p for p in self.peers.snapshot() if p.get("status")=="active" and p.get("host")], post=post,
+                          retention_days=c.get("MEM_RETENTION_DAYS",30), archive=self.compactor if c.get("MEM_ARCHIVE_DIR") else None)
+
+    @subsystem("modules.memory_compactor")
+    def compactor(self):
+        from modules.memory_compactor import MemoryCompactor
+        c = self.conf
+        return MemoryCompactor(self.mem, retention_days=c.get("MEM_RETENTION_DAYS",30), archive_dir=c.get("MEM_ARCHIVE_DIR"),
+                               interval=c.get("MEM_COMPACT_INTERVAL",3600), batch=c.get("MEM_COMPACT_BATCH",500),
+                               vacuum_hours=c.get("MEM_VACUUM_HOURS",24))
+
+    @subsystem("modules.p2p_layer", "modules.p2p_message_router")
+    def p2p(self):
+        # DHT layer and router; the listener thread is started by Node.start()
+        if not self.p2p_enabled: return types.SimpleNamespace(layer=None, router=None)
+        from modules.p2p_layer import P2PLayer
+        from modules.p2p_message_router import P2PMessageRouter
+        c = self.conf
+        boot = [(h, int(p)) for h, p in (str(b).rsplit(":", 1) for b in c.get("P2P_BOOTSTRAP") or [])]
+        layer = P2PLayer(c["P2P_HOST"], int(c["P2P_PORT"]), boot, self.node_id)
+        return types.SimpleNamespace(layer=layer, router=P2PMessageRouter(layer))
+
+    @subsystem("modules.gossip_fanout", "modules.gossip_delta", "modules.epidemic", "guardian.reputation_shield")
+    def gossip(self):
+        from modules.gossip_fanout import GossipFanout
+        from modules.gossip_delta import DeltaGossip
+        from modules.epidemic import EpidemicGossip
+        from guardian.guardian_sign import ReplayCache
+        from guardian.reputation_shield import get_reputation
+        c = self.conf; interval = c["GOSSIP_INTERVAL"]
+        fanout = GossipFanout(c["GOSSIP_WORKERS"], c["GOSSIP_PEER_TIMEOUT"], c["GOSSIP_ROUND_DEADLINE"])
+        def pull_post(url, req):
+            r = fanout.session.post(url, json={**req, **sign_packet(req)}, timeout=c["GOSSIP_PEER_TIMEOUT"])
+            data = r.json() if r.status_code==200 else None
+            return data if data and verify_packet(data) else None
+        return types.SimpleNamespace(
+            fanout=fanout, replay_cache=ReplayCache(),
+            delta=DeltaGossip(self.node_id, self.state, self.peers, port=c["MY_PORT"], post=pull_post,
+                              compat=bool(c.get("GOSSIP_COMPAT", False))),
+            epidemic=EpidemicGossip(k=c["GOSSIP_FANOUT"], base_interval=interval, min_interval=max(1, interval/12),
+                                    max_interval=interval*5, weight=get_reputation))
+
+    @subsystem("modules.mhksi_engine")
+    def mhksi(self):
+        from modules.mhksi_engine import MHKSIEngine, MHKSIConfig
+        return MHKSIEngine(MHKSIConfig())
+
+    @subsystem("modules.math_eval")
+    def math(self):
+        from modules.math_eval import MathEvaluator
+        m = MathEvaluator(timeout=float(self.conf.get("MATH_TIMEOUT_S",2.0)), cache_size=int(self.conf.get("MATH_CACHE_SIZE",1024)))
+        atexit.register(m.close); return m
+
+    @subsystem("modules.web_cache")
+    def web(self):
+        from modules.web_cache import WebCache
+        c = self.conf
+        w = WebCache(path=c.get("WEB_CACHE_PATH","web_cache.db"), ttl=float(c.get("WEB_CACHE_TTL_S",86400)),
+                     max_entries=int(c.get("WEB_CACHE_MAX",5000)))
+        atexit.register(w.close); return w
+
+    @subsystem("modules.translator")
+    def translator(self):
+        from modules.translator import Translator
+        c = self.conf
+        t = Translator(cache_size=int(c.get("TRANSLATE_CACHE_SIZE",4096)), path=c.get("TRANSLATE_CACHE_PATH"))
+        atexit.register(t.close); return t
+
+    @subsystem("modules.ask_pipeline")
+    def ask(self):
+        from modules.ask_pipeline import AskPipeline
+        c = self.conf; workers = int(c.get("ASK_WORKERS",8))
+        a = AskPipeline(self, workers=workers, io_workers=workers, budget=c.get("ASK_BUDGET_MS",1500)/1000.0,
+                        max_budget=c.get("ASK_MAX_BUDGET_MS",10000)/1000.0, min_budget=c.get("ASK_MIN_BUDGET_MS",50)/1000.0,
+                        min_score=float(c.get("ASK_MIN_SCORE",0.1)))
+        atexit.register(a.close); return a
+
+    @subsystem("modules.broadcaster")
+    def broadcaster(self):
+        from modules.broadcaster import Broadcaster
+        b = Broadcaster(self.socketio.emit if self.socketio is not None else lambda *a, **k: None,
+                        window=self.conf.get("AFFECT_BROADCAST_MS",2000)/1000.0, scheduler=self.scheduler,
+                        legacy=bool(self.conf.get("BROADCAST_LEGACY", True)))
+        return b.attach(self.socketio) if self.socketio is not None else b
+
+    @subsystem("modules.initiative")
+    def initiative(self):
+        from modules.initiative import Initiative
+        return Initiative(self.conf)
+
+    @subsystem("modules.agent_core", "modules.resource_monitor")
+    def agents(self):
+        from modules.agent_core import Agent
+        from modules.resource_monitor import monitor_resources
+        return [Agent("WebExplorer", self.web_explorer, interval=300),
+                Agent("CodeMutator", self.code_mutator, interval=300),
+                Agent("Reflector", self.daily_reflection, interval=3600),
+                Agent("Planner", lambda: True, interval=300),
+                Agent("ResourceMonitor", monitor_resources, interval=60)]
+
+    def init_all(self):
+        for name in SUBSYSTEMS: getattr(self, name)
+        return self
+
+    def start(self):
+        # Background work; everything it needs is built here if it was not already.
+        with self._lock:
+            if self.started: return self
+            self.started = True
+        c = self.conf; sched = self.scheduler
+        self.search  # tutor turns and skills are indexed from here on
+        self.math.warm()  # SymPy imports in the worker while requests use the fast path
+        if self.p2p.layer is not None:
+            threading.Thread(target=self.p2p.layer.run, daemon=True).start()
+        if c.get("FEATURE_MEM_SYNC", True): self.sync.start(sched)
+        if c.get("MEM_RETENTION_DAYS"):
+            self.compactor.hooks.append(self.search.expire)  # tutor turns follow the memory retention
+            self.compactor.start(sched)
+        if c.get("FEATURE_INITIATIVE", True):
+            self.initiative.start(self.state, record_event=lambda et,pl: self.mem.put_event(et,pl, signer=lambda d:'sig'), scheduler=sched)
+        self.state.subscribe(self.refresh_mhksi, keys=("rho","chi","psi"))
+        for a in self.agents: a.start(sched)
+        sched.every("Gossip", self.gossip_round, self.gossip_interval, first=0)
+        return self
+
+    # --- MHKSI & gossip ---
+    def refresh_mhksi(self, keys=None, snap=None):
+        # Updates MHKSI and emits only when an input changed or M is still settling.
+        snap = snap or self.state.snapshot(); mhksi = self.mhksi
+        inputs = (snap["rho"], snap["chi"], snap["psi"], estimate_network_curvature(self.peers.snapshot()), estimate_presence_density())
+        with self._mhksi_lock:
+            if inputs == self._mhksi_inputs and abs(mhksi.compute_instant(*inputs) - mhksi.M) < 1e-3: return
+            self._mhksi_inputs = inputs
+            res = mhksi.update(*inputs); now = time.monotonic()
+            record = res["mode"] != self._mhksi_logged[1] or now - self._mhksi_logged[0] >= self.conf["MHKSI_EVENT_INTERVAL_S"]
+            if record: self._mhksi_logged = (now, res["mode"])
+        self.emit("mhksi_state", {"M": res["M"], "mode": res["mode"], "instant": res["instant"]})
+        # sampled input history for offline config sweeps (python -m modules.mhksi_replay); the
+        # events are synced to every peer, so at most one per interval unless the mode changes
+        if record: self.mem.put_event("mhksi", {"node": self.node_id, **dict(zip(("rho","chi","psi","tau","s"), inputs)),
+                                     "instant": res["instant"], "M": res["M"], "mode": res["mode"]})
+
+    def gossip_round(self):
+        from guardian.guardian_sign import SignedPacket, ReplayCache
+        from guardian.reputation_shield import update_reputation
+        g = self.gossip; epidemic_mode = self.conf["GOSSIP_MODE"] == "epidemic"
+        active = self.peers.active()
+        news0 = g.delta.stats["news"]
+        targets = g.epidemic.select(active) if epidemic_mode else active
+        packet = SignedPacket(g.delta.packet())  # encoded + signed once for every destination
+        # HTTP fanout (only if we have peers with host/port known)
+        hosts = {p["node_id"]: p.get("host") for p in targets}
+        for nid, r in g.fanout.send(targets, packet.body).items():
+            if r["skipped"]: continue  # no outcome before the round deadline: status and reputation unchanged
+            self.peers.update(nid, "active" if r["ok"] else "inactive")
+            update_reputation(nid, 0.01 if r["ok"] else -0.05)
+            reply = r.get("reply") or {}
+            # push-pull: the reply carries the peer's digest, signed like any other packet
+            if reply.get("digest") and g.replay_cache.check(reply) == ReplayCache.NEW:
+                g.delta.on_gossip(reply, hosts.get(nid))
+        # P2P DHT message (if enabled)
+        if self.p2p.router:
+            self.p2p.router.send_message(f"gossip_{self.node_id}", packet.body)
+        self.refresh_mhksi()  # peer count feeds tau
+        self.peers.cleanup(30)
+        if epidemic_mode:
+            g.epidemic.observe(g.delta.stats["news"] - news0, len(targets))
+
+    def gossip_interval(self):
+        return self.gossip.epidemic.next_sleep() if self.conf["GOSSIP_MODE"] == "epidemic" else self.conf["GOSSIP_INTERVAL"]
+
+    # --- Agents ---
+    def web_explorer(self):
+        if self.offline: return {"agent":"WebExplorer","offline":True}
+        from modules.human_tutor import record_turn
+        topic = random.choice(["neuroplasticity","graph theory","cybernetics"])
+        data = fetch_wikipedia(topic, cache=self.web)
+        if data and "text" in data:
+            txt = self.translator.translate_doc(data["text"], self.lang, src=data.get("lang"))
+            self.skills.add(topic, txt, 0.5); record_turn(topic, txt, 0.5, None)
+            self.agi_metrics["skills_new"] += 1
+            self.mem.put_event("knowledge", {"topic":topic})
+            return {"agent":"WebExplorer","topic":topic}
+        return {"agent":"WebExplorer","topic":topic,"bytes":0}
+
+    def code_mutator(self):
+        from modules.gpt_mutator import mutate
+        from guardian.entropy_guard import entropy_guard
+        from guardian.quarantine import quarantine_exec
+        prompt = random.choice(["Optimize memory usage","Add /peers improvements","Refactor planner"])
+        new_code = mutate(prompt)
+        if not entropy_guard({"code":new_code}): return {"agent":"CodeMutator","error":"low entropy"}
+        ok, out = quarantine_exec(new_code)
+        if ok:
+            self.mem.put_event("self_patch", {"lines": len(new_code.splitlines())})
+            self.agi_metrics["self_lines"] += len(new_code.splitlines())
+        return {"agent":"CodeMutator","ok":ok}
+
+    def daily_reflection(self):
+        from modules.goal_stack import push_goal, generate_goal_from_summary
+        new_goal = generate_goal_from_summary("...", lang=self.lang)
+        push_goal(new_goal, priority=0.9)
+        self.agi_metrics["goals_achieved"] += 1
+        self.mem.put_event("reflection", {"goal": new_goal})
+        return {"agent":"Reflector","new_goal":new_goal}
 
 # --- HTTP API ---
-@app.route('/')
-def index(): return send_from_directory(app.static_folder, "index.html")
+bp = Blueprint("echo", __name__)
+def _node() -> Node: return current_app.extensions["echo"]
+
+@bp.route('/')
+def index(): return send_from_directory(current_app.static_folder, "index.html")
 
-@app.route('/peers')
+@bp.route('/peers')
 def peers_view():
-    peers = load_peers()
+    peers = _node().peers.snapshot()
     peers_sorted = sorted(peers, key=lambda x: (x.get("status")!="active", x.get("last_seen","")), reverse=True)
     return jsonify(peers_sorted)
 
-@app.route('/gossip', methods=['POST'])
+@bp.route('/gossip', methods=['POST'])
 def receive_gossip():
-    data = request.json
+    from guardian.guardian_sign import ReplayCache
+    node = _node(); data = request.json
     try:
+        if data.get("proto", 1) >= 2:
+            g = node.gossip
+            seen = g.replay_cache.check(data)
+            if seen == ReplayCache.DUP: return jsonify({"status":"ok", "duplicate": True})
+            if seen == ReplayCache.BAD: return jsonify({"error":"invalid"}), 400
+            pull = g.delta.on_gossip(data, request.remote_addr)
+            resp = {"status":"ok", "pull": pull, **g.delta.packet()}
+            return jsonify({**resp, **sign_packet(resp)})
+        from modules.signature_core import verify_signature
         if verify_packet(data) and verify_signature(data["state"], data["signature"]):
-            state.update(data["state"])
+            node.state.update({k:v for k,v in data["state"].items() if k!="node_id"})
             for peer in data.get("peers", []):
-                update_peer_status(peer["node_id"], "active", peer.get("host"), peer.get("port"))
+                node.peers.update(peer["node_id"], "active", peer.get("host"), peer.get("port"))
             return jsonify({"status":"ok"})
         return jsonify({"error":"invalid"}), 400
     except Exception as e:
         log_error("GossipReceive", e); return jsonify({"error":"fail"}), 500
 
-@app.route('/mhksi')
+@bp.route('/gossip/pull', methods=['POST'])
+def gossip_pull():
+    data = request.json or {}
+    try:
+        if not verify_packet(data): return jsonify({"error":"invalid"}), 400
+        resp = _node().gossip.delta.pull_response(data)
+        return jsonify({**resp, **sign_packet(resp)})
+    except Exception as e:
+        log_error("GossipPull", e); return jsonify({"error":"fail"}), 500
+
+@bp.route('/memsync', methods=['POST'])
+def memsync():
+    data = request.json or {}
+    try:
+        if not verify_packet(data): return jsonify({"error":"invalid"}), 400
+        return jsonify(_node().sync.handle({k:v for k,v in data.items() if k not in ("sig","ts")}))
+    except Exception as e:
+        log_error("MemSync", e); return jsonify({"error":"fail"}), 500
+
+@bp.route('/mhksi')
 def mhksi_view():
+    mhksi = _node().mhksi
     return jsonify({"M": mhksi.M, "mode": mhksi.mode})
 
-@app.route('/mhksi/config', methods=['POST'])
+def _epoch_arg(v):
+    if v in (None, ""): return None
+    try: return float(v)
+    except ValueError: return datetime.fromisoformat(v).timestamp()
+
+@bp.route('/mhksi/history')
+def mhksi_history():
+    # ?from=&to= epoch seconds or ISO time, res=raw|minute|hour|auto, limit=N
+    try:
+        return jsonify(_node().mhksi.history.query(_epoch_arg(request.args.get("from")), _epoch_arg(request.args.get("to")),
+                                                   request.args.get("res", "auto"), int(request.args.get("limit", 5000))))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@bp.route('/mhksi/config', methods=['POST'])
 def mhksi_cfg():
     data = request.json or {}
-    cfg = mhksi.cfg
+    cfg = _node().mhksi.cfg
     for k,v in data.items():
         if hasattr(cfg, k):
             setattr(cfg, k, float(v) if isinstance(getattr(cfg,k), float) else v)
     return jsonify({"ok": True, "cfg": cfg.__dict__})
 
-@app.route('/ask', methods=['POST'])
+@bp.route('/ask', methods=['POST'])
 def ask():
+    # optional: "lang" of the text, "budget_ms" latency budget (clamped to ASK_MIN/MAX_BUDGET_MS)
     t0 = time.time()
-    data = request.json or {}
-    txt = translate(data.get("text",""), current_lang)
-    entry = compose_entry(state, get_context(), txt)
-    if "?" in txt:
-        try:
-            expr = sympify(txt.split("=")[0]); entry["narration"] = str(N(expr))
-        except Exception:
-            if not OFFLINE_MODE:
-                r = fetch_wikipedia(txt)
-                if r and "text" in r: entry["narration"] = translate(r["text"], current_lang)
-    m_eff = state["rho"]**2 + state["chi"]
+    node = _node(); data = request.json or {}
+    budget = data.get("budget_ms")
+    if budget is not None:
+        try: budget = float(budget)
+        except (TypeError, ValueError): budget = math.nan
+        if isinstance(data["budget_ms"], bool) or not math.isfinite(budget):
+            return jsonify({"error": "budget_ms must be a number"}), 400
+        budget /= 1000
+    entry = node.ask.run(data.get("text",""), lang=data.get("lang"), budget=budget)
+    snap = entry["state"]
+    m_eff = snap["rho"]**2 + snap["chi"]
     # legacy signal
-    socketio.emit("state_update", {"coh": mhksi_core(state["psi"], state["rho"], state["chi"], m_eff)})
-    entry["narration"] = AffectEngine().decorate(entry["narration"], state)
-    entry["policy"] = {"mode": mhksi.mode, "mutations": mhksi.mode=='explore', "proactivity": mhksi.mode!='conserve'}
-    agi_metrics["interactions"] += 1; agi_metrics["response_time"] = time.time()-t0
+    node.emit("state_update", {"coh": mhksi_core(snap["psi"], snap["rho"], snap["chi"], m_eff)})
+    node.agi_metrics["interactions"] += 1; node.agi_metrics["response_time"] = time.time()-t0
     return jsonify(entry)
 
-@app.route('/health')
+@bp.route('/health')
 def health():
+    from modules.p2p_layer import KADEMLIA_AVAILABLE
+    node = _node()
     features = {
-        "p2p_enabled": bool(FEATURE_P2P),
+        "p2p_enabled": node.p2p_enabled,
         "kademlia_available": bool(KADEMLIA_AVAILABLE),
-        "lang": current_lang,
-        "offline_mode": OFFLINE_MODE,
-        "node_id": NODE_ID
+        "lang": node.lang,
+        "offline_mode": node.offline,
+        "node_id": node.node_id
     }
-    return jsonify({"ok": True, "features": features})
+    return jsonify({"ok": True, "features": features, "started": node.started, "subsystems": sorted(node._built)})
+
+@bp.route('/scheduler')
+def scheduler_view():
+    return jsonify(_node().scheduler.stats())
+
+def create_app(config=None, start=False, socketio=True):
+    # config: dict of overrides on top of load_config(); nothing is opened or started
+    # until a subsystem is used or start=True / node.start() is called.
+    conf = load_config(overrides=config)
+    app = Flask(__name__, static_folder="static")
+    node = Node(conf)
+    app.extensions["echo"] = node
+    app.register_blueprint(bp)
+    if socketio:
+        t0 = time.perf_counter()
+        from flask_socketio import SocketIO
+        node.socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+        node.timings["socketio"] = {"import_ms": round((time.perf_counter()-t0)*1e3, 2), "init_ms": 0.0}
+        node.broadcaster  # registers the subscribe/unsubscribe handlers
+    if start: node.start()
+    return app
+
+def profile_startup(config=None):
+    # Builds every subsystem explicitly (no background loops) and reports the cost of each.
+    t0 = time.perf_counter()
+    app = create_app(config)
+    node = app.extensions["echo"].init_all()
+    total = (time.perf_counter() - t0) * 1e3
+    rows = [("core imports", _IMPORT_MS, 0.0)] + [(k, v["import_ms"], v["init_ms"]) for k, v in node.timings.items()]
+    print(f"{'subsystem':14} {'import ms':>10} {'init ms':>10}")
+    for name, imp, init in rows: print(f"{name:14} {imp:10.1f} {init:10.1f}")
+    print(f"{'total':14} {_IMPORT_MS + total:21.1f}")
+    return rows
 
 # --- Start ---
 if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--profile-startup", action="store_true", help="print import/init time per subsystem and exit")
+    args = ap.parse_args()
+    if args.profile_startup:
+        profile_startup(); sys.exit(0)
+    from modules.apply_wings import apply_wings
+    app = create_app()
+    node = app.extensions["echo"]
     load_personas()
-    apply_wings(app, socketio, state)
-    threading.Thread(target=gossip_state, daemon=True).start()
-    print(f"[START] Node ID: {NODE_ID} | P2P: {FEATURE_P2P} | Kademlia: {KADEMLIA_AVAILABLE}")
-    socketio.run(app, host='0.0.0.0', port=MY_PORT)
+    apply_wings(app, node.socketio, node.state)
+    node.start()
+    print(f"[START] Node ID: {node.node_id} | P2P: {node.p2p_enabled} | Kademlia: {node.p2p.layer is not None}")
+    node.socketio.run(app, host='0.0.0.0', port=node.conf["MY_PORT"])
@@ -1,10 +1,11 @@
-import threading, time
+from modules.scheduler import get_scheduler
 class Agent:
-    def __init__(self, name, fn, interval=60): self.name=name; self.fn=fn; self.interval=interval
-    def start(self):
-        def loop():
-            while True:
-                try: self.fn()
-                except Exception: pass
-                time.sleep(self.interval)
-        threading.Thread(target=loop, daemon=True).start()
+    # A named periodic job on the shared scheduler (no thread of its own).
+    def __init__(self, name, fn, interval=60, jitter=0.1): self.name=name; self.fn=fn; self.interval=interval; self.jitter=jitter; self.job=None
+    def start(self, scheduler=None):
+        self.job=(scheduler or get_scheduler()).every(self.name, self.fn, self.interval, jitter=self.jitter, first=0)
+        return self.job
+    def stop(self):
+        if self.job: self.job.cancel()
+    @property
+    def stats(self): return self.job.stats if self.job else {}
@@ -1 +1,7 @@
-def fetch_wikipedia(q): return {'text': f'Info about {q}'}
+from modules.web_cache import get_cache
+
+def _fetch_wikipedia(q): return {'text': f'Info about {q}', 'lang': 'en'}
+
+def fetch_wikipedia(q, offline=False, cache=None):
+    # cached (modules.web_cache); offline returns the last known answer, possibly stale
+    return (cache or get_cache()).fetch(q, _fetch_wikipedia, ns="wikipedia", offline=offline)
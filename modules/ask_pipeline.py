@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from echo_mind.fractal_mind import compose_entry
+from modules.persona_manager import get_context
+from modules.affect_engine import AffectEngine
+from modules.agent_web_ops import fetch_wikipedia
+from modules.error_logger import log_error
+
+def _answered(fut):
+    return fut.done() and not fut.cancelled() and fut.exception() is None and fut.result() not in (None, [])
+
+class AskPipeline:
+    # /ask stages under one deadline: translate (max half the budget), then math and search
+    # in parallel, web on its own pool only if neither answered within `hedge`. Stages cut
+    # off by the deadline go to entry["skipped"], ones that raised to entry["errors"].
+    def __init__(self, node, workers=8, io_workers=8, budget=1.5, max_budget=10.0, hedge=0.05, min_score=0.1, min_budget=0.05):
+        self.node = node; self.budget = budget; self.max_budget = max_budget; self.min_budget = min_budget
+        self.hedge = hedge; self.min_score = min_score
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="Ask")
+        self._io = ThreadPoolExecutor(io_workers, thread_name_prefix="AskIO")
+        self.stats = {"requests": 0, "partial": 0, "skipped": {}, "errors": {}}
+
+    def _wait(self, fut, deadline, name, skipped, errors):
+        try: return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            fut.cancel(); skipped.append(name)
+        except Exception as e:
+            log_error("Ask", e); errors.append(name)
+        return None
+
+    def run(self, text, lang=None, budget=None):
+        node = self.node; t0 = time.monotonic()
+        budget = self.budget if budget is None else min(max(float(budget), self.min_budget), self.max_budget)
+        deadline = t0 + budget; skipped = []; errors = []
+        tr = self._pool.submit(node.translator.translate, text, node.lang, lang)
+        txt = self._wait(tr, min(deadline, t0 + budget/2), "translate", skipped, errors)
+        if txt is None: txt = text
+        snap = node.state.snapshot()  # one consistent view for the whole request
+        entry = compose_entry(snap.as_dict(), get_context(), txt)
+        if "?" in txt:
+            math_f = self._pool.submit(node.math.evaluate, txt)
+            search_f = self._pool.submit(node.search.search, txt, ("skill","tutor","long_term"), 1, self.min_score)
+            hedge_until = min(deadline, time.monotonic() + self.hedge)
+            for f in (math_f, search_f):
+                try: f.result(timeout=max(0.0, hedge_until - time.monotonic()))
+                except Exception: pass
+            web_f = None if _answered(math_f) or _answered(search_f) else self._io.submit(self._web, txt)
+            answer = self._wait(math_f, deadline, "math", skipped, errors)
+            if answer is not None:
+                entry["narration"] = answer
+            known = None if answer is not None else self._wait(search_f, deadline, "search", skipped, errors)
+            if known:
+                entry["narration"] = known[0]["text"]; entry["source"] = known[0]["kind"]
+            elif answer is None:
+                narration = self._wait(web_f, deadline, "web", skipped, errors)
+                if narration: entry["narration"] = narration
+            for f in (search_f, web_f):  # answered earlier: drop whatever has not started yet
+                if f is not None: f.cancel()
+        entry["narration"] = AffectEngine().decorate(entry["narration"], snap)
+        mode = node.mhksi.mode
+        entry["policy"] = {"mode": mode, "mutations": mode=='explore', "proactivity": mode!='conserve'}
+        entry["skipped"] = skipped; entry["errors"] = errors; entry["partial"] = bool(skipped or errors)
+        entry["elapsed_ms"] = round((time.monotonic() - t0) * 1e3, 1)
+        self.stats["requests"] += 1
+        if entry["partial"]: self.stats["partial"] += 1
+        for key, names in (("skipped", skipped), ("errors", errors)):
+            for n in names: self.stats[key][n] = self.stats[key].get(n, 0) + 1
+        return entry
+
+    def _web(self, txt):
+        node = self.node
+        r = fetch_wikipedia(txt, offline=node.offline, cache=node.web)  # offline: cached copy only
+        if r and "text" in r: return node.translator.translate_doc(r["text"], node.lang, src=r.get("lang"))
+        return None
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True); self._io.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,73 @@
+import time, threading
+from modules.error_logger import log_error
+
+_MISSING = object()
+LEGACY_ROOM = "legacy"
+
+class Broadcaster:
+    # Coalesced socket.io fan-out, at most one flush per `window` seconds (the first
+    # event after a quiet period goes out immediately). Wire format, event = channel:
+    #   subscribed clients ("subscribe" {"channels": [...]}): {"seq", "full"} once,
+    #     then {"seq", "delta"} with only the keys that changed
+    #   clients that never subscribe (legacy=True): the channel's full current
+    #     payload, as before, just rate limited
+    def __init__(self, emit, window=2.0, scheduler=None, legacy=True):
+        self._emit = emit; self.window = window; self.scheduler = scheduler; self.legacy = legacy
+        self._lock = threading.Lock()
+        self._pending = {}; self._sent = {}; self._seq = {}
+        self._last = 0.0; self._armed = False
+        self.stats = {"published": 0, "flushes": 0, "sent": 0, "dropped_keys": 0}
+
+    @staticmethod
+    def room(channel): return f"ch:{channel}"
+
+    def publish(self, channel, data):
+        with self._lock:
+            p = self._pending.setdefault(channel, {})
+            self.stats["dropped_keys"] += len(p.keys() & data.keys())  # overwritten before being sent
+            p.update(data); self.stats["published"] += 1
+            if self._armed: return
+            self._armed = True
+            delay = max(0.0, self._last + self.window - time.monotonic())
+        if self.scheduler is not None: self.scheduler.once("Broadcast", self.flush, delay)
+        else: threading.Timer(delay, self.flush).start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._armed = False; self._last = time.monotonic()
+            out = []
+            for ch, data in pending.items():
+                sent = self._sent.setdefault(ch, {})
+                delta = {k: v for k, v in data.items() if sent.get(k, _MISSING) != v}
+                if not delta: continue
+                sent.update(delta); self._seq[ch] = self._seq.get(ch, 0) + 1
+                out.append((ch, {"seq": self._seq[ch], "delta": delta}, self.room(ch)))
+                if self.legacy: out.append((ch, dict(sent), LEGACY_ROOM))
+            self.stats["flushes"] += 1
+        for ch, msg, room in out:
+            try: self._emit(ch, msg, to=room); self.stats["sent"] += 1
+            except Exception as e: log_error("Broadcast", e)
+
+    def snapshot(self, channel):
+        with self._lock:
+            return {"seq": self._seq.get(channel, 0), "full": dict(self._sent.get(channel, {}))}
+
+    def attach(self, socketio):
+        # client -> "subscribe" / "unsubscribe" with {"channels": [...]}; connecting
+        # clients start in the legacy room and leave it on their first subscribe
+        from flask import request
+        from flask_socketio import join_room, leave_room, emit
+        def channels(data): return [str(c) for c in (data or {}).get("channels", [])]
+        @socketio.on("connect")
+        def _connect(auth=None):
+            if self.legacy: join_room(LEGACY_ROOM)
+        @socketio.on("subscribe")
+        def _subscribe(data):
+            leave_room(LEGACY_ROOM)
+            for ch in channels(data):
+                join_room(self.room(ch)); emit(ch, self.snapshot(ch), to=request.sid)
+        @socketio.on("unsubscribe")
+        def _unsubscribe(data):
+            for ch in channels(data): leave_room(self.room(ch))
+        return self
@@ -1,2 +1,7 @@
-def store_long_term(x): pass
-def query_long_term(tag): return []
+_index=None
+def attach(index):
+    global _index; _index=index
+def store_long_term(x):
+    if _index is not None: _index.add("long_term", "", x)
+def query_long_term(tag, limit=10):
+    return _index.search(tag, kinds=("memory","long_term"), limit=limit) if _index is not None else []
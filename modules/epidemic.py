@@ -0,0 +1,36 @@
+import random
+
+class EpidemicGossip:
+    # Peer sampling and pacing for push-pull gossip. Each round contacts k peers
+    # drawn without replacement, weighted by `weight` (e.g. reputation). The round
+    # interval shrinks while rounds keep carrying news and backs off while quiet.
+    def __init__(self, k=3, base_interval=60.0, min_interval=5.0, max_interval=300.0,
+                 speedup=0.5, backoff=1.5, weight=None, rng=None):
+        self.k=k; self.interval=float(base_interval)
+        self.min_interval=float(min_interval); self.max_interval=float(max_interval)
+        self.speedup=speedup; self.backoff=backoff
+        self.weight=weight or (lambda node_id: 1.0); self.rng=rng or random.Random()
+        self.history=[]  # news count of recent rounds, newest last
+        self.stats={"rounds":0,"contacted":0}
+
+    def select(self, peers):
+        # Efraimidis-Spirakis weighted sampling: key = u ** (1 / w), keep the k largest.
+        if len(peers) <= self.k: return list(peers)
+        keyed=[]
+        for p in peers:
+            w=max(1e-6, float(self.weight(p.get("node_id"))))
+            keyed.append((self.rng.random() ** (1.0 / w), p))
+        keyed.sort(key=lambda t: t[0], reverse=True)
+        return [p for _, p in keyed[:self.k]]
+
+    def observe(self, news, contacted):
+        # news: how many exchanges this round carried something we had not seen.
+        self.stats["rounds"]+=1; self.stats["contacted"]+=contacted
+        self.history=(self.history+[news])[-8:]
+        if news: self.interval=max(self.min_interval, self.interval*self.speedup)
+        else: self.interval=min(self.max_interval, self.interval*self.backoff)
+        return self.interval
+
+    def next_sleep(self):
+        # +-10% jitter keeps nodes that booted together from gossiping in lockstep.
+        return self.interval*(0.9+0.2*self.rng.random())
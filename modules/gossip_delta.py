@@ -0,0 +1,119 @@
+import os, threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.error_logger import log_error
+from modules.signature_core import sign_state
+
+PROTO = 2
+LOCAL_KEYS = ("node_id",)   # never adopted from peers
+PEER_DELTA_MAX = 64         # peer records per pull; larger backlogs page over later rounds
+_NONE = object()
+
+class DeltaGossip:
+    # Packets carry digests (state/peer versions); receivers pull only the parts they lack
+    # from /gossip/pull. State merges LWW on (counter, node_id); direct StateStore writes
+    # count as local. compat=True (opt-in) adds full state + signature for proto-1 peers.
+    def __init__(self, node_id, state, peers, port=None, post=None, on_state=None, submit=None, compat=False):
+        self.node_id=node_id; self.state=state; self.peers=peers
+        self.port=port; self.post=post; self.on_state=on_state
+        self.epoch=os.urandom(4).hex()   # lets receivers notice our counters restarting
+        self.state_v=0; self.state_meta={k: [0, node_id] for k in state}
+        self.known={}                    # sender -> {"epoch","state_v","peers_v"}
+        self._lock=threading.Lock(); self._inflight=set()
+        self._pool=None; self._submit=submit   # submit(fn, *args) runs a pull; defaults to a small thread pool
+        self.stats={"pulls":0,"merged_keys":0,"merged_peers":0,"news":0,"local":0}
+        self.compat=compat; self._own={}  # key -> last value this object wrote
+        if hasattr(state, "subscribe"): state.subscribe(self._on_change)
+
+    # --- sender side ---
+    def digest(self):
+        return {"epoch":self.epoch, "state_v":self.state_v, "peers_v":self.peers.version}
+
+    def packet(self):
+        p={"node":self.node_id, "proto":PROTO, "port":self.port, "digest":self.digest()}
+        if self.compat:
+            st=dict(self.state); p.update(state=st, signature=sign_state(st))
+        return p
+
+    def set_local(self, key, value):
+        with self._lock:
+            c=self.state_meta.get(key, [0, self.node_id])[0]+1
+            self._own[key]=value
+            self.state.update({key: value}); self.state_meta[key]=[c, self.node_id]; self.state_v+=1
+
+    def _on_change(self, keys, snap):
+        # StateStore subscription: keys whose value is not the one we merged/set came from a local writer
+        with self._lock:
+            local=[k for k in keys if k not in LOCAL_KEYS and k in snap and self._own.get(k, _NONE)!=snap[k]]
+            for k in local:
+                self.state_meta[k]=[self.state_meta.get(k, [0, self.node_id])[0]+1, self.node_id]; self._own[k]=snap[k]
+            if local: self.state_v+=1; self.stats["local"]+=len(local)
+
+    def pull_response(self, req):
+        want=set(req.get("want", ()))
+        out={"node":self.node_id, "epoch":self.epoch}
+        if "state" in want:
+            with self._lock:
+                out.update(state_v=self.state_v, state=dict(self.state), state_meta={k:list(v) for k,v in self.state_meta.items()})
+        if "peers" in want:
+            out["peers"], out["peers_v"]=self.peers.changed_since(int(req.get("peers_since", -1)), PEER_DELTA_MAX)
+        return out
+
+    # --- receiver side ---
+    def on_gossip(self, packet, remote_host):
+        # Returns the parts we are missing; the pull itself runs in the background.
+        sender=packet.get("node"); d=packet.get("digest") or {}
+        if not sender or sender==self.node_id: return []
+        if remote_host and packet.get("port"):
+            self.peers.update(sender, "active", remote_host, packet["port"])
+        with self._lock:
+            k=self.known.get(sender)
+            if k is None or k["epoch"]!=d.get("epoch"):
+                k=self.known[sender]={"epoch":d.get("epoch"), "state_v":-1, "peers_v":-1}
+            want=[]
+            if d.get("state_v", -1)!=k["state_v"]: want.append("state")
+            if d.get("peers_v", -1)!=k["peers_v"]: want.append("peers")
+            if want: self.stats["news"]+=1
+            if not want or sender in self._inflight or not (remote_host and packet.get("port") and self.post):
+                return want
+            self._inflight.add(sender)
+        req={"want":want, "peers_since":k["peers_v"]}
+        if self._submit is None:
+            self._pool=ThreadPoolExecutor(max_workers=4, thread_name_prefix="gossip-pull"); self._submit=self._pool.submit
+        self._submit(self._pull, sender, f"http://{remote_host}:{packet['port']}/gossip/pull", req)
+        return want
+
+    def _pull(self, sender, url, req):
+        try:
+            resp=self.post(url, req)
+            if resp: self.merge(sender, resp)
+            self.stats["pulls"]+=1
+        except Exception as e:
+            log_error("GossipPull", e)
+        finally:
+            with self._lock: self._inflight.discard(sender)
+
+    def merge(self, sender, resp):
+        changed={}
+        with self._lock:
+            k=self.known.setdefault(sender, {"epoch":resp.get("epoch"), "state_v":-1, "peers_v":-1})
+            if "state" in resp:
+                meta=resp.get("state_meta", {})
+                for key, val in resp["state"].items():
+                    if key in LOCAL_KEYS: continue
+                    rm=meta.get(key, [0, sender]); lm=self.state_meta.get(key, [0, ""])
+                    if (rm[0], rm[1]) > (lm[0], lm[1]) and self.state.get(key)!=val:
+                        self.state_meta[key]=[rm[0], rm[1]]; changed[key]=val
+                    elif (rm[0], rm[1]) > (lm[0], lm[1]):
+                        self.state_meta[key]=[rm[0], rm[1]]
+                if changed:
+                    self._own.update(changed); self.state.update(changed); self.state_v+=1  # one write (one snapshot) per merge
+                k["state_v"]=resp.get("state_v", k["state_v"])
+            if "peers" in resp:
+                for p in resp["peers"]:
+                    if p.get("status")=="active" and p.get("node_id")!=self.node_id:
+                        self.peers.update(p["node_id"], "active", p.get("host"), p.get("port"))
+                        self.stats["merged_peers"]+=1
+                k["peers_v"]=resp.get("peers_v", k["peers_v"])
+        self.stats["merged_keys"]+=len(changed)
+        if changed and self.on_state: self.on_state(changed)
+        return changed
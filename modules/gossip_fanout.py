@@ -0,0 +1,59 @@
+import json, time, threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+
+class GossipFanout:
+    # Sends one gossip packet to many peers over a shared keep-alive session with
+    # bounded parallelism. Each POST has its own timeout and the whole round has a
+    # deadline; peers without an outcome by then (never started or still in flight)
+    # come back as skipped, so callers don't count them as failures.
+    def __init__(self, max_workers=16, peer_timeout=3.0, round_deadline=10.0, path="/gossip"):
+        self.max_workers=max_workers; self.peer_timeout=peer_timeout; self.round_deadline=round_deadline
+        self.path=path
+        self.session=requests.Session()
+        adapter=HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=0)
+        self.session.mount("http://", adapter); self.session.mount("https://", adapter)
+        self._pool=ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gossip")
+        self._lock=threading.Lock()
+        self.latency={}  # node_id -> seconds of the last successful POST
+        self.stats={"rounds":0,"sent":0,"ok":0,"failed":0,"timed_out":0,"skipped":0,"last_round":0.0}
+
+    def _post(self, peer, body, headers):
+        t0=time.monotonic()
+        try:
+            r=self.session.post(f"http://{peer['host']}:{peer['port']}{self.path}", data=body, headers=headers,
+                                timeout=(min(1.0, self.peer_timeout), self.peer_timeout))
+            ok=r.status_code==200
+            reply=r.json() if ok and r.content else None
+        except Exception:
+            ok=False; reply=None
+        dt=time.monotonic()-t0
+        if ok:
+            with self._lock: self.latency[peer["node_id"]]=dt
+        return ok, dt, reply
+
+    def send(self, peers, packet):
+        # packet: dict (encoded here, once) or pre-encoded JSON bytes.
+        # Returns {node_id: {"ok": bool, "skipped": bool, "latency": float|None, "reply": decoded JSON body|None}}.
+        body=packet if isinstance(packet, (bytes, bytearray)) else json.dumps(packet).encode()
+        headers={"Content-Type": "application/json"}
+        t0=time.monotonic()
+        futs={self._pool.submit(self._post, p, body, headers): p for p in peers if p.get("host") and p.get("port")}
+        done, pending=wait(futs, timeout=self.round_deadline)
+        out={}
+        for f in done:
+            ok, dt, reply=f.result(); out[futs[f]["node_id"]]={"ok":ok, "skipped":False, "latency":dt, "reply":reply}
+        not_started=0
+        for f in pending:
+            not_started+=f.cancel()  # False: already in flight, outcome still unknown
+            out[futs[f]["node_id"]]={"ok":False, "skipped":True, "latency":None, "reply":None}
+        ok_n=sum(1 for r in out.values() if r["ok"])
+        with self._lock:
+            s=self.stats; s["rounds"]+=1; s["sent"]+=len(futs)-not_started; s["ok"]+=ok_n
+            s["skipped"]+=not_started; s["timed_out"]+=len(pending)-not_started; s["failed"]+=len(done)-ok_n
+            s["last_round"]=time.monotonic()-t0
+        return out
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True); self.session.close()
@@ -0,0 +1,186 @@
+import os, re, ast, sys, json, math, time, queue, operator, threading, subprocess
+from collections import OrderedDict
+from modules.error_logger import log_error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_LEN = 200          # longer questions are not treated as arithmetic
+MAX_INT_BITS = 10000   # bigger integer powers go to the SymPy worker (and its timeout)
+START_TIMEOUT = 30.0   # a worker that has not imported SymPy by then is considered broken
+
+class _Unsupported(Exception):
+    # valid expression syntax the fast path cannot evaluate; SymPy may
+    pass
+
+class _NotReady(Exception):
+    pass
+
+def _pow(a, b):
+    if isinstance(a, int) and isinstance(b, int) and abs(a) > 1 and b > 0 and b * a.bit_length() > MAX_INT_BITS:
+        raise _Unsupported("power too large")
+    r = a ** b
+    if isinstance(r, complex): raise _Unsupported("complex result")  # (-8)**0.5
+    return r
+
+_BIN = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+        ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: _pow}
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+_FUNCS = {"sqrt": math.sqrt, "sin": math.sin, "cos": math.cos, "tan": math.tan, "asin": math.asin,
+          "acos": math.acos, "atan": math.atan, "log": math.log, "ln": math.log, "exp": math.exp,
+          "abs": abs, "floor": math.floor, "ceil": math.ceil}
+_CONSTS = {"pi": math.pi, "e": math.e}
+
+def _eval(node):
+    if isinstance(node, ast.Expression): return _eval(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float): return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN: return _BIN[type(node.op)](_eval(node.left), _eval(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY: return _UNARY[type(node.op)](_eval(node.operand))
+    if isinstance(node, ast.Name) and node.id in _CONSTS: return _CONSTS[node.id]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCS
+            and not node.keywords and 1 <= len(node.args) <= 2):
+        return _FUNCS[node.func.id](*[_eval(a) for a in node.args])
+    raise _Unsupported(type(node).__name__)
+
+_SAFE = (ast.Expression, ast.Load, ast.BinOp, ast.UnaryOp, *_BIN, *_UNARY)
+
+def _forwardable(tree):
+    # only plain arithmetic on numbers, symbols and whitelisted functions reaches sympify (which evals)
+    for n in ast.walk(tree):
+        if isinstance(n, ast.Constant) and type(n.value) in (int, float): continue
+        if isinstance(n, ast.Name) and not n.id.startswith("_"): continue
+        if isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id in _FUNCS and not n.keywords: continue
+        if not isinstance(n, _SAFE): return False
+    return True
+
+def _fmt(v):
+    if isinstance(v, int): return str(v)
+    if not isinstance(v, float): raise _Unsupported(type(v).__name__)
+    if v.is_integer() and abs(v) < 1e15: return str(int(v))
+    return format(v, ".15g")
+
+def normalize(text):
+    # "2 ^ 3 = ?" -> "2**3"; None when it does not look like arithmetic at all
+    expr = " ".join(str(text).split("=")[0].split()).rstrip("?").strip()
+    if not expr or len(expr) > MAX_LEN or not re.search(r"\d", expr): return None
+    return expr.replace("^", "**")
+
+def fast_eval(expr):
+    # None: not an expression (or not one SymPy may see); _Unsupported: parsed, but only SymPy can answer it
+    try: tree = ast.parse(expr, mode="eval")
+    except (SyntaxError, ValueError): return None
+    try: return _fmt(_eval(tree))
+    except (_Unsupported, ArithmeticError, ValueError, TypeError) as e:
+        if not _forwardable(tree): return None
+        raise e if isinstance(e, _Unsupported) else _Unsupported(str(e))
+
+class _SympyWorker:
+    # Child interpreter answering one JSON line per expression. It imports SymPy in
+    # the background; until then ask() raises _NotReady instead of waiting.
+    def __init__(self):
+        self.proc = None; self.out = None; self.ready = threading.Event(); self.t0 = 0.0
+
+    def start(self):
+        self.proc = subprocess.Popen([sys.executable, "-m", "modules.math_eval"], cwd=ROOT, text=True,
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.out = queue.Queue(); self.ready = threading.Event(); self.t0 = time.monotonic()
+        def pump(stdout, q, ready):
+            if stdout.readline(): ready.set()
+            for line in stdout: q.put(line)
+            q.put(None)
+        threading.Thread(target=pump, args=(self.proc.stdout, self.out, self.ready), name="SympyWorkerOut", daemon=True).start()
+
+    def ask(self, expr, timeout):
+        if self.proc is None: self.start()
+        if not self.ready.is_set():
+            if self.proc.poll() is not None or time.monotonic() - self.t0 > START_TIMEOUT:
+                self.kill(); raise RuntimeError("sympy worker did not start")
+            raise _NotReady()
+        if self.proc.poll() is not None:
+            self.start(); raise _NotReady()
+        self.proc.stdin.write(json.dumps(expr) + "\n"); self.proc.stdin.flush()
+        try: line = self.out.get(timeout=timeout)
+        except queue.Empty:
+            self.kill(); raise TimeoutError(expr)
+        if line is None:
+            self.proc = None; raise RuntimeError("sympy worker exited")
+        return json.loads(line)
+
+    def kill(self):
+        if self.proc is not None:
+            try: self.proc.kill(); self.proc.wait(1)
+            except Exception: pass
+        self.proc = None
+
+_BUSY = object()
+
+class MathEvaluator:
+    # /ask math path: normalize -> LRU cache -> safe fast parser -> SymPy worker
+    # process with a hard timeout, for what the fast path parsed but cannot evaluate.
+    def __init__(self, cache_size=1024, timeout=2.0, workers=1, fallback=True):
+        self.cache_size = cache_size; self.timeout = timeout; self.fallback = fallback
+        self._cache = OrderedDict(); self._lock = threading.Lock()
+        self._all = [_SympyWorker() for _ in range(max(1, workers))]; self._workers = queue.Queue()
+        for w in self._all: self._workers.put(w)
+        self._down_until = 0.0  # SymPy worker failed to start (e.g. not installed): retry later
+        self.stats = {"hits": 0, "fast": 0, "sympy": 0, "timeouts": 0, "busy": 0, "none": 0}
+
+    def evaluate(self, text):
+        expr = normalize(text)
+        if expr is None: return None
+        with self._lock:
+            if expr in self._cache:
+                self._cache.move_to_end(expr); self.stats["hits"] += 1
+                return self._cache[expr]
+        try:
+            res = fast_eval(expr); self.stats["fast" if res is not None else "none"] += 1
+        except _Unsupported:
+            res = self._sympy(expr) if self.fallback else None
+            if res is _BUSY: return None  # not cached: may succeed once a worker frees up
+        with self._lock:
+            self._cache[expr] = res
+            while len(self._cache) > self.cache_size: self._cache.popitem(last=False)
+        return res
+
+    def warm(self):
+        # spawn the workers now so the SymPy import is done before the first request needs it
+        if self.fallback:
+            for w in self._all:
+                if w.proc is None: w.start()
+
+    def _sympy(self, expr):
+        if time.monotonic() < self._down_until: return _BUSY
+        try: w = self._workers.get(timeout=self.timeout)
+        except queue.Empty:
+            self.stats["busy"] += 1; return _BUSY
+        try:
+            res = w.ask(expr, self.timeout); self.stats["sympy"] += 1
+            return res
+        except TimeoutError:
+            self.stats["timeouts"] += 1; return None
+        except _NotReady:
+            self.stats["busy"] += 1; return _BUSY
+        except Exception as e:
+            log_error("MathEval", e); self._down_until = time.monotonic() + 60; return _BUSY
+        finally:
+            self._workers.put(w)
+
+    def close(self):
+        for w in self._all: w.kill()
+
+_EVALUATOR = None
+def get_evaluator(**kw):
+    global _EVALUATOR
+    if _EVALUATOR is None: _EVALUATOR = MathEvaluator(**kw)
+    return _EVALUATOR
+
+def evaluate(text): return get_evaluator().evaluate(text)
+
+def _worker_main():
+    from sympy import sympify, N
+    sys.stdout.write("\"ready\"\n"); sys.stdout.flush()
+    for line in sys.stdin:
+        try: res = str(N(sympify(json.loads(line))))
+        except Exception: res = None
+        sys.stdout.write(json.dumps(res) + "\n"); sys.stdout.flush()
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,100 @@
+import os, gzip, json, glob, time
+from datetime import datetime, timedelta
+from modules.error_logger import log_error
+from modules.memory_store import ID_MAX
+from modules.scheduler import get_scheduler
+
+class MemoryCompactor:
+    # Background retention for MemoryStore: rows older than retention_days are
+    # optionally rolled into per-day gzip JSONL segments (read-only once renamed
+    # into place) and then deleted from the hot DB in small transactions.
+    def __init__(self, store, retention_days=30, archive_dir=None, interval=3600, batch=500,
+                 pause=0.05, vacuum_hours=24, vacuum_pages=1000):
+        self.store=store; self.retention_days=retention_days; self.archive_dir=archive_dir or None
+        self.interval=interval; self.batch=max(1, int(batch)); self.pause=pause
+        self.vacuum_every=vacuum_hours*3600 if vacuum_hours else 0; self.vacuum_pages=vacuum_pages
+        self._last_vacuum=time.time(); self._stop=False; self.job=None
+        self.hooks=[]  # fn(cutoff) for derived data under the same retention (e.g. SearchIndex.expire)
+        self.stats={"runs":0,"expired":0,"archived":0,"segments":0,"last_run":None,"last_vacuum":None}
+        if self.archive_dir: os.makedirs(self.archive_dir, exist_ok=True)
+
+    def start(self, scheduler=None):
+        self.job=(scheduler or get_scheduler()).every("MemoryCompactor", self._tick, self.interval, first=0)
+    def stop(self):
+        self._stop=True
+        if self.job: self.job.cancel()
+    def _tick(self):
+        if self._stop: return
+        try: self.run_once()
+        except Exception as e: log_error("MemoryCompactor", e)
+
+    def cutoff(self, now=None):
+        return ((now or datetime.utcnow()) - timedelta(days=self.retention_days)).isoformat()
+
+    def run_once(self, now=None):
+        cutoff=self.cutoff(now)
+        if self.archive_dir: self._archive(cutoff)
+        while not self._stop:
+            n=self.store.delete_before(cutoff, self.batch)
+            self.stats["expired"]+=n
+            if n < self.batch: break
+            time.sleep(self.pause)  # let queued writers in between batches
+        for fn in self.hooks:
+            try: fn(cutoff)
+            except Exception as e: log_error("MemoryCompactor", e)
+        self.store.checkpoint()
+        if self.vacuum_every and time.time()-self._last_vacuum >= self.vacuum_every:
+            self.store.vacuum(self.vacuum_pages); self._last_vacuum=time.time()
+            self.stats["last_vacuum"]=datetime.utcnow().isoformat()
+        self.stats["runs"]+=1; self.stats["last_run"]=datetime.utcnow().isoformat()
+
+    # --- archive segments ---
+    def _segment_path(self, day):
+        base=os.path.join(self.archive_dir, f"mem_{day}"); n=0
+        while glob.glob(f"{base}.{n}.jsonl.gz"): n+=1
+        return f"{base}.{n}.jsonl.gz"
+
+    def _archive(self, cutoff):
+        # Rows arrive in (ts, id) order, so each day's rows form one contiguous segment.
+        out=None; day=None; tmp=None
+        def seal():
+            out.close(); os.replace(tmp, self._segment_path(day)); self.stats["segments"]+=1
+        try:
+            for e in self.store.iter_since("", raw=True):
+                if e["ts"] >= cutoff: break
+                if e["ts"][:10] != day:
+                    if out: seal()
+                    day=e["ts"][:10]; tmp=os.path.join(self.archive_dir, f".mem_{day}.tmp")
+                    out=gzip.open(tmp, "wt", encoding="utf-8")
+                out.write(json.dumps({**{k:e[k] for k in ("id","ts","type","hash","sig")},
+                                      "payload":json.loads(e["payload_json"])}, separators=(",",":"))+"\n")
+                self.stats["archived"]+=1
+            if out: seal()
+        except Exception:
+            if out and not out.closed: out.close()
+            raise
+
+    def segments(self, since_ts=""):
+        if not self.archive_dir: return []
+        paths=sorted(glob.glob(os.path.join(self.archive_dir, "mem_*.jsonl.gz")))
+        day=since_ts[:10]
+        return [p for p in paths if os.path.basename(p)[4:14] >= day]
+
+    def iter_archive(self, since_ts="", since_id="", etype=None):
+        last=(since_ts, since_id or (ID_MAX if since_ts else ""))
+        for p in self.segments(since_ts):
+            with gzip.open(p, "rt", encoding="utf-8") as f:
+                for line in f:
+                    e=json.loads(line); key=(e["ts"], e["id"])
+                    if key <= last: continue  # also drops rows repeated by a re-archived day
+                    last=key
+                    if etype is None or e["type"] == etype: yield e
+
+    def iter_since(self, since_ts="", since_id="", etype=None, raw=False):
+        # Archived history first, then the hot DB; both are (ts, id) ordered.
+        last=(since_ts, since_id or (ID_MAX if since_ts else ""))
+        for e in self.iter_archive(since_ts, since_id, etype):
+            last=max(last, (e["ts"], e["id"]))
+            if raw: e={**e, "payload_json": json.dumps(e.pop("payload"))}
+            yield e
+        yield from self.store.iter_since(*last, etype=etype, raw=raw)
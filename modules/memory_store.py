@@ -1,32 +1,202 @@
-import os, sqlite3, json, hashlib
+import os, sqlite3, json, hashlib, threading, queue, time, itertools
 from datetime import datetime
+from modules.error_logger import log_error
 DDL = """
 CREATE TABLE IF NOT EXISTS mem_entries (
   id TEXT PRIMARY KEY, ts TEXT NOT NULL, type TEXT NOT NULL,
   payload_json TEXT NOT NULL, hash TEXT NOT NULL, sig TEXT NOT NULL);
-CREATE INDEX IF NOT EXISTS idx_ts ON mem_entries (ts);
+DROP INDEX IF EXISTS idx_ts;
+CREATE INDEX IF NOT EXISTS idx_ts_id ON mem_entries (ts, id);
+CREATE INDEX IF NOT EXISTS idx_type_ts_id ON mem_entries (type, ts, id);
 """
+# Full-text index over entries (external content: text lives only in mem_entries).
+FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS mem_fts USING fts5(type, payload_json, content='mem_entries', content_rowid='rowid', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS mem_fts_ai AFTER INSERT ON mem_entries BEGIN
+  INSERT INTO mem_fts(rowid, type, payload_json) VALUES (new.rowid, new.type, new.payload_json);
+END;
+CREATE TRIGGER IF NOT EXISTS mem_fts_ad AFTER DELETE ON mem_entries BEGIN
+  INSERT INTO mem_fts(mem_fts, rowid, type, payload_json) VALUES ('delete', old.rowid, old.type, old.payload_json);
+END;
+"""
+INSERT_SQL = "INSERT OR REPLACE INTO mem_entries VALUES (?,?,?,?,?,?)"
+ID_MAX = "\U0010ffff"  # sorts after every id
+_FLUSH = object()
+
 class MemoryStore:
-    def __init__(self, db_path="memory.db"):
+    # Per-thread WAL connections. batched=True routes writes through a bounded
+    # queue and one writer thread committing every flush_size rows / flush_interval s.
+    def __init__(self, db_path="memory.db", batched=False, flush_interval=0.5, flush_size=256, queue_size=10000, fts=True):
         self.db_path=db_path
+        self.batched=batched; self.flush_interval=flush_interval; self.flush_size=max(1, int(flush_size))
+        self.generation=0  # bumped on every write; lets derived indexes know when to rebuild
+        self.committed=0   # bumped after writes are committed; safe key for read caches
+        self._commit_hooks=[]
+        self._local=threading.local()
+        self._conns=[]; self._conns_lock=threading.Lock()
         os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
-        with sqlite3.connect(self.db_path) as c:
-            for stmt in DDL.strip().split(";"):
-                s=stmt.strip()
-                if s: c.execute(s)
-            c.commit()
+        c=self._conn()
+        for stmt in DDL.strip().split(";"):
+            s=stmt.strip()
+            if s: c.execute(s)
+        c.commit()
+        self.fts=False
+        if fts:
+            try:
+                fresh=c.execute("SELECT 1 FROM sqlite_master WHERE name='mem_fts'").fetchone() is None
+                c.executescript(FTS_DDL)
+                if fresh: c.execute("INSERT INTO mem_fts(mem_fts) VALUES ('rebuild')"); c.commit()
+                self.fts=True
+            except sqlite3.OperationalError as e:  # sqlite built without FTS5
+                log_error("MemoryStore", e)
+        self._q=None; self._writer=None; self._closed=False
+        self._q_lock=threading.Lock()  # close() cannot detach the queue between a producer's check and its put
+        if batched:
+            self._q=queue.Queue(maxsize=queue_size)
+            self._writer=threading.Thread(target=self._write_loop, args=(self._q,), name="MemoryStoreWriter", daemon=True)
+            self._writer.start()
+
+    def _conn(self):
+        c=getattr(self._local, "conn", None)
+        if c is None:
+            c=sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            c.execute("PRAGMA auto_vacuum=INCREMENTAL")  # must precede the first write (journal_mode included); no-op later
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            c.execute("PRAGMA recursive_triggers=ON")  # REPLACE must fire the FTS delete trigger
+            self._local.conn=c
+            with self._conns_lock: self._conns.append(c)
+        return c
+    connection=_conn
+
+    @staticmethod
+    def _row(entry):
+        return (entry["id"],entry["ts"],entry["type"],json.dumps(entry["payload"]),entry["hash"],entry["sig"])
+
     def put(self, entry: dict):
-        with sqlite3.connect(self.db_path) as c:
-            c.execute("INSERT OR REPLACE INTO mem_entries VALUES (?,?,?,?,?,?)",
-                (entry["id"],entry["ts"],entry["type"],json.dumps(entry["payload"]),entry["hash"],entry["sig"]))
-            c.commit()
+        row=self._row(entry)
+        self.generation+=1
+        with self._q_lock:
+            if self._q is not None:
+                self._q.put(row)  # blocks when the queue is full: backpressure on producers
+                return
+        c=self._conn()
+        c.execute(INSERT_SQL, row)
+        c.commit(); self._committed([row[0]])
+
+    def _write_loop(self, q):  # q, not self._q: close() detaches it before stopping us
+        c=self._conn()
+        while True:
+            first=q.get()
+            if first is None or first is _FLUSH:
+                q.task_done()
+                if first is None: return
+                continue
+            batch=[first]; markers=0; stop=False
+            deadline=time.monotonic()+self.flush_interval
+            while len(batch) < self.flush_size:
+                left=deadline-time.monotonic()
+                if left <= 0: break
+                try: row=q.get(timeout=left)
+                except queue.Empty: break
+                if row is None or row is _FLUSH:
+                    markers+=1; stop = row is None; break
+                batch.append(row)
+            try:
+                c.executemany(INSERT_SQL, batch)
+                c.commit(); self._committed([r[0] for r in batch])
+            except Exception as e:
+                log_error("MemoryStoreWriter", e)
+                try: c.rollback()
+                except Exception: pass
+            for _ in range(len(batch)+markers): q.task_done()
+            if stop: return
+
+    def flush(self):
+        """Block until every queued write has been committed; returns at once after close()."""
+        with self._q_lock:
+            q=self._q
+            if self._closed or q is None: return
+            q.put(_FLUSH)
+        q.join()  # close() drains whatever the stopped writer left, marker included
+
+    def close(self):
+        # later put()s write synchronously instead of queueing for a writer that is gone
+        with self._q_lock:
+            self._closed=True; q, self._q = self._q, None
+        if self._writer is not None and self._writer.is_alive():
+            q.put(None); self._writer.join()
+        if q is not None:
+            late=[]
+            while True:
+                try: row=q.get_nowait()
+                except queue.Empty: break
+                if row is not None and row is not _FLUSH: late.append(row)
+                q.task_done()
+            if late:
+                c=self._conn(); c.executemany(INSERT_SQL, late); c.commit(); self._committed([r[0] for r in late])
+        with self._conns_lock:
+            for c in self._conns:
+                try: c.close()
+                except Exception: pass
+            self._conns=[]
+        self._local=threading.local()
+
+    def on_commit(self, fn):
+        # fn(ids) after every commit that wrote or deleted those ids (writer thread included)
+        self._commit_hooks.append(fn)
+    def _committed(self, ids):
+        self.committed+=1
+        for fn in self._commit_hooks:
+            try: fn(ids)
+            except Exception as e: log_error("MemoryStore", e)
+
     def put_event(self, etype, payload, signer=lambda d:"nosig"):
         ts = datetime.utcnow().isoformat()
         rid = hashlib.sha256(f"{ts}{etype}{json.dumps(payload,sort_keys=True)}".encode()).hexdigest()[:16]
         h = hashlib.sha256(json.dumps(payload,sort_keys=True).encode()).hexdigest()
         self.put({"id":rid,"ts":ts,"type":etype,"payload":payload,"hash":h,"sig":signer(payload)}); return rid
-    def pull_since(self, since_ts, limit=1000):
-        with sqlite3.connect(self.db_path) as c:
-            cur=c.execute("SELECT id,ts,type,payload_json,hash,sig FROM mem_entries WHERE ts > ? ORDER BY ts ASC LIMIT ?",(since_ts,limit))
-            rows=cur.fetchall()
-        return [{"id":r[0],"ts":r[1],"type":r[2],"payload":json.loads(r[3]),"hash":r[4],"sig":r[5]} for r in rows]
+    def iter_since(self, since_ts="", since_id="", etype=None, page_size=500, raw=False):
+        # Keyset pagination on (ts, id): rows sharing a ts at a page boundary are never skipped.
+        # Without since_id, rows at exactly since_ts are excluded (plain "ts > since_ts").
+        # Only one page is held at a time; raw=True yields payload_json undecoded.
+        where="(ts, id) > (?, ?)"; args=[since_ts, since_id or (ID_MAX if since_ts else "")]
+        if etype is not None: where="type = ? AND "+where; args.insert(0, etype)
+        sql=f"SELECT id,ts,type,payload_json,hash,sig FROM mem_entries WHERE {where} ORDER BY ts, id LIMIT ?"
+        while True:
+            rows=self._conn().execute(sql, (*args, page_size)).fetchall()
+            for r in rows:
+                if raw: yield {"id":r[0],"ts":r[1],"type":r[2],"payload_json":r[3],"hash":r[4],"sig":r[5]}
+                else: yield {"id":r[0],"ts":r[1],"type":r[2],"payload":json.loads(r[3]),"hash":r[4],"sig":r[5]}
+            if len(rows) < page_size: return
+            args[-2], args[-1] = rows[-1][1], rows[-1][0]
+    def pull_since(self, since_ts, limit=1000, since_id="", etype=None):
+        return list(itertools.islice(self.iter_since(since_ts, since_id, etype, page_size=min(limit, 1000) or 1), limit))
+    def iter_id_hash(self):
+        yield from self._conn().execute("SELECT id,hash FROM mem_entries")
+    def id_hashes_under(self, prefix):
+        return self._conn().execute("SELECT id,hash FROM mem_entries WHERE id >= ? AND id < ?",
+                                    (prefix, prefix+ID_MAX)).fetchall()
+    def get_many(self, ids):
+        out=[]; ids=list(ids)
+        for i in range(0, len(ids), 500):
+            chunk=ids[i:i+500]
+            cur=self._conn().execute(f"SELECT id,ts,type,payload_json,hash,sig FROM mem_entries WHERE id IN ({','.join('?'*len(chunk))})", chunk)
+            out.extend({"id":r[0],"ts":r[1],"type":r[2],"payload":json.loads(r[3]),"hash":r[4],"sig":r[5]} for r in cur)
+        return out
+    def delete_before(self, cutoff_ts, limit=500):
+        c=self._conn()
+        ids=[r[0] for r in c.execute("SELECT id FROM mem_entries WHERE ts < ? ORDER BY ts, id LIMIT ?", (cutoff_ts, limit))]
+        c.executemany("DELETE FROM mem_entries WHERE id = ?", [(i,) for i in ids])
+        c.commit()
+        if ids: self.generation+=1; self._committed(ids)
+        return len(ids)
+    def checkpoint(self, mode="PASSIVE"):
+        return self._conn().execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    def vacuum(self, pages=1000):
+        c=self._conn()
+        if c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            c.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall(); c.commit()
+        else:
+            c.execute("PRAGMA auto_vacuum=INCREMENTAL"); c.execute("VACUUM")  # one-off conversion of pre-existing DBs
+        self.checkpoint("TRUNCATE")
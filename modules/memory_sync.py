@@ -1,12 +1,152 @@
-import threading, time
+import threading, time, random, json, hashlib, itertools
+from datetime import datetime, timedelta
+from modules.error_logger import log_error
+from modules.scheduler import get_scheduler
+
+LEAF_DEPTH = 3      # id-prefix length of the leaf buckets (4096 for hex ids)
+FETCH_BATCH = 500
+
+def _digest(id_, h):
+ return int.from_bytes(hashlib.sha256(f"{id_}|{h}".encode()).digest()[:16], "big")
+
+def _valid(e):
+ try:
+  return all(k in e for k in ("id","ts","type","payload","hash","sig")) and \
+   hashlib.sha256(json.dumps(e["payload"],sort_keys=True).encode()).hexdigest()==e["hash"]
+ except Exception: return False
+
+class RangeHashIndex:
+ # Prefix tree over mem_entries.id; each node holds (count, xor of entry digests).
+ # Leaf buckets (id[:depth]) touched by a commit are re-read on the next summary and
+ # their change is XORed into their ancestors, so no summary flushes the writer or
+ # rescans the table after the first build.
+ def __init__(self, store, depth=LEAF_DEPTH):
+  self.store=store; self.depth=depth; self._buckets=None; self._nodes={}; self._kids={}
+  self._lock=threading.Lock(); self._dirty=set(); self._dirty_lock=threading.Lock()
+  self._gen=None; self._hooked=hasattr(store, "on_commit")
+  if self._hooked: store.on_commit(self._touch)
+ def _touch(self, ids):
+  with self._dirty_lock: self._dirty.update(i[:self.depth] for i in ids)
+ def _set(self, key, c, x):
+  old=self._buckets.get(key, (0, 0)); dc=c-old[0]; dx=x^old[1]
+  if not dc and not dx: return
+  if c: self._buckets[key]=(c, x)
+  else: self._buckets.pop(key, None)
+  for L in range(len(key)+1):
+   p=key[:L]; n=self._nodes.get(p)
+   if n is None:
+    n=self._nodes[p]=[0, 0]
+    if L: self._kids.setdefault(p[:-1], set()).add(p)
+   n[0]+=dc; n[1]^=dx
+   if not n[0]:
+    del self._nodes[p]
+    if L: self._kids.get(p[:-1], set()).discard(p)
+ def _rebuild(self):
+  with self._dirty_lock: self._dirty.clear()
+  buckets={}
+  for id_, h in self.store.iter_id_hash():
+   b=buckets.setdefault(id_[:self.depth], [0, 0]); b[0]+=1; b[1]^=_digest(id_, h)
+  self._buckets={}; self._nodes={}; self._kids={}
+  for k, (c, x) in buckets.items(): self._set(k, c, x)
+ def _reload(self, key):
+  c=x=0
+  for id_, h in self.store.id_hashes_under(key):
+   if id_[:self.depth]==key: c+=1; x^=_digest(id_, h)
+  self._set(key, c, x)
+ def refresh(self):
+  with self._lock:
+   if not self._hooked:  # plain stores: rebuild whenever the generation moved
+    gen=getattr(self.store, "generation", None)
+    if self._buckets is None or gen is None or gen!=self._gen: self._rebuild(); self._gen=gen
+    return
+   if self._buckets is None: self._rebuild(); return
+   with self._dirty_lock: dirty, self._dirty = self._dirty, set()
+   for key in dirty: self._reload(key)
+ def node(self, prefix):
+  c, x = self._nodes.get(prefix, (0, 0))
+  return [c, format(x, "032x")]
+ def summary(self, prefixes):
+  self.refresh()
+  return {p: {"self": self.node(p), "children": {k: self.node(k) for k in self._kids.get(p, ())}} for p in prefixes}
+
 class MemorySync:
- def __init__(self, store, interval=120, p2p_router=None):
-  self.store=store; self.interval=interval; self.p2p=p2p_router; self._stop=False
- def start(self):
-  threading.Thread(target=self._loop, daemon=True).start()
- def stop(self): self._stop=True
- def _loop(self):
-  while not self._stop:
-   time.sleep(self.interval)
- def export_diff(self, since_ts):
-  return self.store.pull_since(since_ts)
+ def __init__(self, store, interval=120, p2p_router=None, get_peers=None, post=None, retention_days=None, archive=None):
+  self.store=store; self.interval=interval; self.p2p=p2p_router; self._stop=False; self.job=None
+  self.retention_days=retention_days
+  self.archive=archive  # MemoryCompactor: diffs also cover history already moved to the archive
+  self.get_peers=get_peers or (lambda: []); self.post=post
+  self.index=RangeHashIndex(store)
+  self.stats={"rounds":0,"messages":0,"pulled":0,"pushed":0,"last_peer":None,"last_duration":0.0}
+ def start(self, scheduler=None):
+  self.job=(scheduler or get_scheduler()).every("MemorySync", self.run_once, self.interval, jitter=0.1)
+ def stop(self):
+  self._stop=True
+  if self.job: self.job.cancel()
+ def run_once(self):
+  if self._stop or self.post is None: return
+  peers=self.get_peers()
+  if not peers: return
+  peer=random.choice(peers)
+  try: self.reconcile(lambda msg: self.post(peer, msg)); self.stats["last_peer"]=peer.get("node_id")
+  except Exception as e: log_error("MemorySync", e)
+ def export_diff(self, since_ts, since_id="", limit=1000):
+  if self.archive is None: return self.store.pull_since(since_ts, limit=limit, since_id=since_id)
+  return list(itertools.islice(self.iter_diff(since_ts, since_id, raw=False), limit))
+ def iter_diff(self, since_ts, since_id="", etype=None, raw=True):
+  return (self.archive or self.store).iter_since(since_ts, since_id, etype, raw=raw)
+
+ # --- anti-entropy: responder side ---
+ def handle(self, msg):
+  op=msg.get("op")
+  if op=="summary":
+   return {"summary": self.index.summary(msg.get("prefixes", [""]))}
+  if op=="ids":
+   return {"ids": {p: self.store.id_hashes_under(p) for p in msg.get("prefixes", [])}}
+  if op=="get":
+   return {"entries": self.store.get_many(msg.get("ids", [])[:FETCH_BATCH])}
+  if op=="put":
+   return {"stored": self._store_entries(msg.get("entries", []))}
+  return {"error": "unknown op"}
+ def _store_entries(self, entries):
+  n=0
+  cutoff=(datetime.utcnow()-timedelta(days=self.retention_days)).isoformat() if self.retention_days else ""
+  for e in entries:
+   if _valid(e) and e["ts"] >= cutoff: self.store.put(e); n+=1
+  return n
+
+ # --- anti-entropy: initiator side ---
+ def reconcile(self, send):
+  # Walk the range-hash tree top-down, descending only into prefixes whose
+  # digests differ, then swap the missing entries in both directions.
+  t0=time.time(); self.stats["rounds"]+=1
+  def call(msg):
+   self.stats["messages"]+=1; return send(msg)
+  leaves=[]; frontier=[""]
+  while frontier:
+   remote=call({"op":"summary","prefixes":frontier})["summary"]
+   local=self.index.summary(frontier)
+   nxt=[]
+   for p in frontier:
+    r=remote.get(p) or {"self":[0,"0"*32],"children":{}}; l=local[p]
+    if r["self"]==l["self"]: continue
+    if len(p)>=LEAF_DEPTH: leaves.append(p); continue
+    diff=[k for k in set(r["children"])|set(l["children"]) if r["children"].get(k)!=l["children"].get(k)]
+    if diff: nxt.extend(diff)
+    else: leaves.append(p)  # short ids living directly at this prefix
+   frontier=nxt
+  if not leaves: self.stats["last_duration"]=time.time()-t0; return {"pulled":0,"pushed":0}
+  remote_ids={}
+  for i in range(0, len(leaves), 64):
+   for ids in call({"op":"ids","prefixes":leaves[i:i+64]})["ids"].values():
+    remote_ids.update((k, h) for k, h in ids)
+  local_ids={}
+  for p in leaves: local_ids.update(self.store.id_hashes_under(p))
+  want=[k for k in remote_ids if k not in local_ids]
+  give=[k for k in local_ids if k not in remote_ids]
+  pulled=pushed=0
+  for i in range(0, len(want), FETCH_BATCH):
+   pulled+=self._store_entries(call({"op":"get","ids":want[i:i+FETCH_BATCH]})["entries"])
+  for i in range(0, len(give), FETCH_BATCH):
+   pushed+=call({"op":"put","entries":self.store.get_many(give[i:i+FETCH_BATCH])}).get("stored",0)
+  self.stats["pulled"]+=pulled; self.stats["pushed"]+=pushed; self.stats["last_duration"]=time.time()-t0
+  return {"pulled":pulled,"pushed":pushed}
@@ -1,5 +1,15 @@
 import math, time
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, asdict
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+MODES = ("conserve", "steady", "explore")  # mode codes used by the batch API
+_PARAMS = ("a1", "a2", "a3", "a4", "a5", "ema_alpha", "eps", "m0", "on_threshold", "off_threshold")
 
 def _sigmoid(x: float) -> float:
     x = max(-20.0, min(20.0, x))
@@ -18,12 +28,82 @@ class MHKSIConfig:
     on_threshold: float = 0.72
     off_threshold: float = 0.28
 
+class _Ring:
+    # Preallocated columns, slot i % cap holds entry i. With `width`, entries are time
+    # buckets holding sums, M min/max, count and the last mode.
+    def __init__(self, cap: int, width: float = None):
+        self.cap = cap; self.width = width; self.n = 0
+        z = bytes(8 * cap)
+        self.t = array("d", z); self.inst = array("d", z); self.M = array("d", z)
+        self.mode = array("b", bytes(cap))
+        if width:
+            self.lo = array("d", z); self.hi = array("d", z); self.cnt = array("q", z)
+
+    def add(self, ts: float, inst: float, M: float, mode: int):
+        cap = self.cap
+        if not self.width:
+            i = self.n % cap; self.n += 1
+            self.t[i] = ts; self.inst[i] = inst; self.M[i] = M; self.mode[i] = mode
+            return
+        b = ts - ts % self.width; i = (self.n - 1) % cap
+        if self.n and self.t[i] == b:
+            self.inst[i] += inst; self.M[i] += M; self.cnt[i] += 1; self.mode[i] = mode
+            if M < self.lo[i]: self.lo[i] = M
+            if M > self.hi[i]: self.hi[i] = M
+            return
+        i = self.n % cap; self.n += 1
+        self.t[i] = b; self.inst[i] = inst; self.M[i] = M; self.lo[i] = M; self.hi[i] = M; self.cnt[i] = 1; self.mode[i] = mode
+
+    def _first_at(self, ts: float) -> int:
+        # entries are in time order; binary search over the logical index range
+        lo, hi = max(0, self.n - self.cap), self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.t[mid % self.cap] < ts: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def query(self, t0: float, t1: float, limit: int) -> dict:
+        start = self._first_at(t0); end = min(self._first_at(math.nextafter(t1, math.inf)), start + limit)
+        idx = [k % self.cap for k in range(start, end)]
+        if not self.width:
+            return {"t": [self.t[i] for i in idx], "instant": [self.inst[i] for i in idx],
+                    "M": [self.M[i] for i in idx], "mode": [MODES[self.mode[i]] for i in idx]}
+        return {"t": [self.t[i] for i in idx], "instant": [self.inst[i] / self.cnt[i] for i in idx],
+                "M": [self.M[i] / self.cnt[i] for i in idx], "M_min": [self.lo[i] for i in idx],
+                "M_max": [self.hi[i] for i in idx], "n": [self.cnt[i] for i in idx],
+                "mode": [MODES[self.mode[i]] for i in idx]}
+
+class MHKSIHistory:
+    # (ts, instant, M, mode): the last `raw` samples plus minute and hour aggregates, fixed memory
+    RESOLUTIONS = ("raw", "minute", "hour")
+
+    def __init__(self, raw: int = 3600, minutes: int = 1440, hours: int = 720):
+        self.rings = {"raw": _Ring(raw), "minute": _Ring(minutes, 60.0), "hour": _Ring(hours, 3600.0)}
+
+    def add(self, ts: float, inst: float, M: float, mode: str):
+        code = MODES.index(mode)
+        for r in self.rings.values(): r.add(ts, inst, M, code)
+
+    def query(self, t0: float = None, t1: float = None, res: str = "auto", limit: int = 5000) -> dict:
+        t1 = time.time() if t1 is None else t1
+        t0 = t1 - 3600 if t0 is None else t0
+        if res == "auto":
+            # finest resolution whose retained window still reaches back to t0
+            res = "hour"
+            for name in self.RESOLUTIONS:
+                r = self.rings[name]
+                if r.n and (r.n <= r.cap or r.t[r.n % r.cap] <= t0) and (name != "raw" or t1 - t0 <= 3600): res = name; break
+        if res not in self.rings: raise ValueError(f"res must be one of {self.RESOLUTIONS} or auto")
+        return {"res": res, "from": t0, "to": t1, **self.rings[res].query(t0, t1, limit)}
+
 class MHKSIEngine:
-    def __init__(self, cfg: MHKSIConfig = MHKSIConfig()):
+    def __init__(self, cfg: MHKSIConfig = MHKSIConfig(), history: MHKSIHistory = None):
         self.cfg = cfg
         self.M = 0.5
         self.mode = "steady"
         self.last_update = time.time()
+        self.history = history or MHKSIHistory()
 
     def _meff(self, s: float) -> float:
         return self.cfg.m0 * (1.0 + math.log(max(self.cfg.eps, s) + self.cfg.eps))
@@ -49,4 +129,101 @@ class MHKSIEngine:
         elif self.cfg.off_threshold < self.M < self.cfg.on_threshold:
             self.mode = "steady"
         self.last_update = time.time()
+        self.history.add(self.last_update, inst, self.M, self.mode)
         return {"M": self.M, "instant": inst, "mode": self.mode}
+
+    def compute_batch(self, rho, chi, psi, tau, s):
+        # instant signal for arrays of inputs, same values as compute_instant per sample
+        if not NUMPY_AVAILABLE: return [self.compute_instant(*row) for row in zip(rho, chi, psi, tau, s)]
+        return batch_instant([self.cfg], rho, chi, psi, tau, s)[0]
+
+    def run_batch(self, rho, chi, psi, tau, s, m_start=None) -> dict:
+        # M and mode (indices into MODES) over arrays of inputs from m_start; self is not modified
+        r = sweep([self.cfg], rho, chi, psi, tau, s, self.M if m_start is None else m_start, keep_series=True)[0]
+        return {"instant": r["instant"], "M": r["M"], "mode": r["mode"]}
+
+def _columns(cfgs):
+    return {k: np.array([float(getattr(c, k)) for c in cfgs])[:, None] for k in _PARAMS}
+
+def batch_instant(cfgs, rho, chi, psi, tau, s):
+    # (len(cfgs), T) instant values: every config over the same T samples
+    p = _columns(cfgs)
+    rho = np.clip(np.asarray(rho, float), 0, 1); chi = np.clip(np.asarray(chi, float), 0, 1)
+    psi = np.clip(np.asarray(psi, float), 0, 1); tau = np.clip(np.asarray(tau, float), -1, 1)
+    s = np.clip(np.asarray(s, float), 0, 1)
+    meff = p["m0"] * (1.0 + np.log(np.maximum(p["eps"], s) + p["eps"]))
+    z = (p["a1"] * np.log(1.0 + p["eps"] + psi) + p["a2"] * (1.0 - chi) + p["a3"] * rho
+         + p["a4"] * tau - p["a5"] * meff)
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -20.0, 20.0)))
+
+def batch_ema(x, alpha, m_start):
+    # M_t = (1-a) M_{t-1} + a x_t along axis 1 of x (C, T). Slow decay: blocked closed form
+    # with d^-L < 1e6 per block; fast decay: impulse response truncated at d^k < 1e-17.
+    x = np.asarray(x, float); C, T = x.shape
+    alpha = np.broadcast_to(np.asarray(alpha, float).reshape(-1), (C,)); d = 1.0 - alpha
+    m = np.broadcast_to(np.asarray(m_start, float), (C,))
+    out = np.empty_like(x)
+    if not T: return out
+    nlog = -np.log(np.clip(d, 1e-300, 1.0))
+    conv = nlog * nlog > 538.0 / T   # ~39/-ln d shifted adds beat ~T*-ln d/13.8 blocks
+    rows = np.flatnonzero(~conv)
+    if len(rows):
+        dr = d[rows, None]; ar = alpha[rows, None]; mr = m[rows].copy(); dmin = float(dr.min())
+        L = min(256, T) if dmin >= 1.0 else max(1, min(256, T, int(13.8 / -math.log(dmin))))
+        for i in range(0, T, L):
+            xb = x[rows, i:i + L]; pw = dr ** np.arange(1, xb.shape[1] + 1)
+            blk = pw * (mr[:, None] + ar * np.cumsum(xb / pw, axis=1))
+            out[rows, i:i + L] = blk; mr = blk[:, -1]
+    rows = np.flatnonzero(conv)
+    if len(rows):
+        dr = d[rows, None]; ar = alpha[rows, None]; xr = x[rows]; dmax = float(dr.max())
+        K = 0 if dmax <= 0.0 else min(T - 1, int(math.ceil(39.0 / -math.log(dmax))))
+        acc = ar * xr; w = ar.copy()
+        for k in range(1, K + 1):
+            w = w * dr; acc[:, k:] += w * xr[:, :-k]
+        j = np.arange(1, min(K + 1, T) + 1)
+        acc[:, :len(j)] += dr ** j * m[rows, None]
+        out[rows] = acc
+    return out
+
+def _summary(cfg, inst, M, codes, keep_series):
+    n = len(M); switches = sum(1 for a, b in zip(codes, codes[1:]) if a != b)
+    r = {"cfg": asdict(cfg), "samples": n, "final_M": float(M[-1]) if n else None,
+         "final_mode": MODES[int(codes[-1])] if n else None, "mean_M": float(sum(M) / n) if n else None,
+         "switches": switches, "share": {m: (sum(1 for c in codes if c == i) / n if n else 0.0) for i, m in enumerate(MODES)}}
+    if keep_series: r.update(instant=inst, M=M, mode=codes)
+    return r
+
+def sweep(cfgs, rho, chi, psi, tau, s, m_start=0.5, keep_series=False):
+    # One summary per config (final/mean M, mode switches, share per mode) over the same
+    # input history; without NumPy each config runs through the scalar engine.
+    cfgs = list(cfgs)
+    if not NUMPY_AVAILABLE:
+        out = []
+        for cfg in cfgs:
+            e = MHKSIEngine(cfg, MHKSIHistory(1, 1, 1)); e.M = m_start; inst = []; M = []; codes = []
+            for row in zip(rho, chi, psi, tau, s):
+                r = e.update(*row); inst.append(r["instant"]); M.append(r["M"]); codes.append(MODES.index(r["mode"]))
+            out.append(_summary(cfg, inst, M, codes, keep_series))
+        return out
+    # instant depends only on a1..a5/eps/m0, M also on ema_alpha: grids share most work
+    sig_keys = {}; ema_keys = {}; rows = []
+    for c in cfgs:
+        sk = tuple(float(getattr(c, k)) for k in _PARAMS[:5] + ("eps", "m0"))
+        si = sig_keys.setdefault(sk, (len(sig_keys), c))[0]
+        rows.append((si, ema_keys.setdefault((si, float(c.ema_alpha)), len(ema_keys))))
+    inst = batch_instant([c for _, c in sig_keys.values()], rho, chi, psi, tau, s)
+    src = [k[0] for k in ema_keys]
+    M = batch_ema(inst[src], [k[1] for k in ema_keys], m_start)
+    out = []; T = M.shape[1]
+    for c, (si, ei) in zip(cfgs, rows):
+        mi = M[ei]
+        codes = np.where(mi >= c.on_threshold, 2, np.where(mi <= c.off_threshold, 0, 1)).astype(np.int8)
+        counts = np.bincount(codes, minlength=3)
+        r = {"cfg": asdict(c), "samples": T, "final_M": float(mi[-1]) if T else None,
+             "final_mode": MODES[int(codes[-1])] if T else None, "mean_M": float(mi.mean()) if T else None,
+             "switches": int(np.count_nonzero(codes[1:] != codes[:-1])),
+             "share": {m: float(counts[k] / T) if T else 0.0 for k, m in enumerate(MODES)}}
+        if keep_series: r.update(instant=inst[si], M=mi, mode=codes)
+        out.append(r)
+    return out
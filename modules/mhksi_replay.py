@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Replays recorded MHKSI inputs ("mhksi" events in memory.db) through many candidate
+# configs at once, to tune thresholds/EMA without waiting for live gossip rounds.
+#
+#   python -m modules.mhksi_replay --db memory.db --grid ema_alpha=0.05,0.12,0.2 --grid on_threshold=0.65,0.72
+import json, argparse, itertools
+from dataclasses import replace, fields
+from modules.mhksi_engine import MHKSIConfig, sweep, NUMPY_AVAILABLE
+
+INPUTS = ("rho", "chi", "psi", "tau", "s")
+
+def load_history(source, since_ts="", node=None):
+    # source: a MemoryStore or MemoryCompactor (archive + hot DB); returns (timestamps, columns).
+    ts = []; cols = {k: [] for k in INPUTS}
+    for e in source.iter_since(since_ts, etype="mhksi"):
+        p = e["payload"]
+        if node and p.get("node") != node: continue
+        try: row = [float(p[k]) for k in INPUTS]
+        except (KeyError, TypeError, ValueError): continue
+        ts.append(e["ts"])
+        for k, v in zip(INPUTS, row): cols[k].append(v)
+    return ts, cols
+
+def grid(specs, base=None):
+    # specs: ["ema_alpha=0.05,0.1", "on_threshold=0.7,0.75"] -> cartesian product of configs
+    base = base or MHKSIConfig(); names = {f.name for f in fields(MHKSIConfig)}; axes = []
+    for spec in specs or ():
+        key, _, vals = spec.partition("=")
+        if key not in names: raise ValueError(f"unknown MHKSIConfig field: {key}")
+        axes.append([(key, float(v)) for v in vals.split(",") if v])
+    return [replace(base, **dict(combo)) for combo in itertools.product(*axes)] if axes else [base]
+
+def replay(source, configs, since_ts="", node=None, m_start=0.5):
+    ts, cols = load_history(source, since_ts, node)
+    res = sweep(configs, *(cols[k] for k in INPUTS), m_start=m_start)
+    return {"samples": len(ts), "from": ts[0] if ts else None, "to": ts[-1] if ts else None, "results": res}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay MHKSI history through candidate configs")
+    ap.add_argument("--db", default="memory.db")
+    ap.add_argument("--archive", help="also read archived segments from this directory")
+    ap.add_argument("--since", default="")
+    ap.add_argument("--node", help="only this node's samples (synced peers record theirs too)")
+    ap.add_argument("--grid", action="append", help="field=v1,v2,... (repeatable)")
+    ap.add_argument("--m-start", type=float, default=0.5)
+    ap.add_argument("--sort", default="switches", help="switches, mean_M, final_M or share:<mode>")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+    from modules.memory_store import MemoryStore
+    source = store = MemoryStore(args.db, fts=False)
+    if args.archive:
+        from modules.memory_compactor import MemoryCompactor
+        source = MemoryCompactor(store, archive_dir=args.archive)
+    out = replay(source, grid(args.grid), args.since, args.node, args.m_start)
+    key = args.sort
+    if key.startswith("share:"): out["results"].sort(key=lambda r: -r["share"][key[6:]])
+    else: out["results"].sort(key=lambda r: (r[key] is None, r[key] or 0))
+    out["results"] = out["results"][:args.top]
+    if args.json:
+        print(json.dumps(out)); return out
+    print(f"{out['samples']} samples {out['from']} .. {out['to']} (numpy: {NUMPY_AVAILABLE})")
+    varied = sorted({k for spec in args.grid or () for k in [spec.partition('=')[0]]})
+    for r in out["results"]:
+        params = " ".join(f"{k}={r['cfg'][k]:g}" for k in varied)
+        share = " ".join(f"{m}={v:.2f}" for m, v in r["share"].items())
+        fm = "-" if r["final_M"] is None else f"{r['final_M']:.3f}"
+        print(f"{params:40} switches={r['switches']:<5} final_M={fm} {share}")
+    return out
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,9 @@
-import os, json, asyncio
-from datetime import datetime, timedelta
+import os, json, asyncio, threading, time, atexit, heapq
+from datetime import datetime
+from modules.error_logger import log_error
 
-try:
-    from kademlia.network import Server
-    KADEMLIA_AVAILABLE = True
-except Exception:
-    KADEMLIA_AVAILABLE = False
-    Server = object  # placeholder
+import importlib.util
+KADEMLIA_AVAILABLE = importlib.util.find_spec("kademlia") is not None  # imported by P2PLayer on first use
 
 PEERS_FILE = "peers.json"
 RETRY_LIMIT = 3
@@ -17,69 +14,176 @@ class P2PLayer:
         self.host = host; self.port = port; self.bootstrap_nodes = bootstrap_nodes
         self.node_id = node_id
         self.loop = None
+        self.server = None
         if KADEMLIA_AVAILABLE:
-            self.server = Server()
-        else:
-            self.server = None
+            try:
+                from kademlia.network import Server
+                self.server = Server()
+            except Exception as e:
+                log_error("P2P", e)
 
     async def _start(self):
-        if not KADEMLIA_AVAILABLE: return
+        if self.server is None: return
         await self.server.listen(self.port, interface=self.host)
         if self.bootstrap_nodes:
             try: await self.server.bootstrap(self.bootstrap_nodes)
             except Exception: pass
 
     def run(self):
-        if not KADEMLIA_AVAILABLE: return
+        if self.server is None: return
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
         self.loop.run_until_complete(self._start())
         try: self.loop.run_forever()
         finally: self.loop.close()
 
+class _Peer:
+    __slots__ = ("node_id", "host", "port", "status", "last_seen", "retries", "v")
+    def __init__(self, node_id, host=None, port=None, status="inactive", last_seen=0.0, retries=0):
+        self.node_id=node_id; self.host=host; self.port=port; self.status=status
+        self.last_seen=last_seen; self.retries=retries; self.v=0
+    def as_dict(self):
+        return {"node_id":self.node_id,"host":self.host,"port":self.port,"status":self.status,
+                "last_seen":datetime.utcfromtimestamp(self.last_seen).isoformat(),"retries":self.retries}
+
+_EPOCH = datetime(1970, 1, 1)
+def _epoch(v):
+    if isinstance(v, (int, float)): return float(v)
+    return (datetime.fromisoformat(v) - _EPOCH).total_seconds()
+
+class PeerTable:
+    # Thread-safe in-memory peer table keyed by node_id, last_seen in epoch seconds.
+    # Mutations mark it dirty; a write-behind timer flushes it atomically (temp file + rename).
+    def __init__(self, path=PEERS_FILE, flush_interval=5.0):
+        self.path=path; self.flush_interval=flush_interval
+        self._peers={}; self._lock=threading.RLock(); self._dirty=False; self._flush_lock=threading.Lock()
+        self.version=0   # bumped on membership/address changes (what gossip digests advertise)
+        self._rev=0      # bumped on every mutation, including last_seen refreshes
+        self._snap=None; self._snap_rev=-1; self._snap_days=None
+        self._timer=None; self._loaded=False
+        self.stats={"flushes":0,"loads":0}
+
+    def _ensure_loaded(self):
+        if self._loaded: return
+        with self._lock:
+            if self._loaded: return
+            self._loaded=True
+            if not os.path.exists(self.path): return
+            try: raw=json.load(open(self.path))
+            except Exception: return
+            self.stats["loads"]+=1
+            for p in raw:
+                try:
+                    self._peers[p["node_id"]]=_Peer(p["node_id"], p.get("host"), p.get("port"), p.get("status","inactive"),
+                                                    _epoch(p.get("last_seen")), int(p.get("retries",0)))
+                except Exception: pass
+            self.version+=1; self._rev+=1
+
+    def _touch(self, peer=None, structural=True):
+        self._rev+=1; self._dirty=True
+        if structural:
+            self.version+=1
+            if peer is not None: peer.v=self.version  # lets changed_since() serve peer-list deltas
+        if self._timer is None and self.flush_interval:
+            self._timer=threading.Thread(target=self._flush_loop, name="PeerTableFlush", daemon=True)
+            self._timer.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try: self.flush()
+            except Exception as e: log_error("PeerTable", e)
+
+    def flush(self):
+        # _dirty is cleared only once the write landed and nothing changed meanwhile
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty: return
+                data=[p.as_dict() for p in self._peers.values()]; rev=self._rev
+            tmp=f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f: json.dump(data, f, separators=(",",":"))
+            os.replace(tmp, self.path)
+            with self._lock:
+                if self._rev==rev: self._dirty=False
+            self.stats["flushes"]+=1
+
+    def update(self, node_id, status, host=None, port=None):
+        self._ensure_loaded()
+        now=time.time()
+        with self._lock:
+            p=self._peers.get(node_id)
+            if p is None:
+                if status=="active" and host and port:
+                    p=self._peers[node_id]=_Peer(node_id, host, port, "active", now, 0); self._touch(p)
+                return
+            # Status flips alone are not advertised: receivers only adopt active peers they lack.
+            structural=bool((host and host!=p.host) or (port and port!=p.port))
+            p.status=status
+            if status=="active": p.last_seen=now; p.retries=0
+            else: p.retries+=1
+            if host: p.host=host
+            if port: p.port=port
+            if p.retries > RETRY_LIMIT: del self._peers[node_id]; structural=True
+            self._touch(p, structural)
+
+    def snapshot(self, days=CLEANUP_DAYS):
+        # Peers seen within `days`, as plain dicts; rebuilt only when the table changed.
+        self._ensure_loaded()
+        with self._lock:
+            if self._snap_rev!=self._rev or self._snap_days!=days:
+                cutoff=time.time()-days*86400
+                self._snap=[p.as_dict() for p in self._peers.values() if p.last_seen >= cutoff]
+                self._snap_rev=self._rev; self._snap_days=days
+            return [dict(p) for p in self._snap]
+
+    def changed_since(self, version, limit=None, days=CLEANUP_DAYS):
+        # Active peers changed after `version`, oldest change first, plus the version they bring
+        # the caller up to. With `limit`, a long backlog is paged out over several calls.
+        self._ensure_loaded()
+        cutoff=time.time()-days*86400
+        with self._lock:
+            cand=[p for p in self._peers.values() if p.v > version and p.status=="active" and p.last_seen >= cutoff]
+            if limit is not None and len(cand) > limit:
+                cand=heapq.nsmallest(limit, cand, key=lambda p: p.v); upto=cand[-1].v
+            else:
+                upto=self.version
+            return [p.as_dict() for p in cand], upto
+
+    def active(self):
+        return [p for p in self.snapshot() if p["status"]=="active"]
+
+    def cleanup(self, days=CLEANUP_DAYS):
+        self._ensure_loaded()
+        cutoff=time.time()-(days+1)*86400  # same whole-day rounding as the old (now - ls).days <= days
+        with self._lock:
+            stale=[k for k, p in self._peers.items() if p.last_seen <= cutoff]
+            for k in stale: del self._peers[k]
+            if stale: self._touch()
+        return len(stale)
+
+    def replace_all(self, peers):
+        self._ensure_loaded()
+        with self._lock:
+            self._peers={p["node_id"]: _Peer(p["node_id"], p.get("host"), p.get("port"), p.get("status","inactive"),
+                                             _epoch(p.get("last_seen", time.time())), int(p.get("retries",0)))
+                         for p in peers if p.get("node_id")}
+            self._touch()
+
+    def __len__(self):
+        self._ensure_loaded(); return len(self._peers)
+
+PEERS = PeerTable()
+atexit.register(PEERS.flush)
+
 def load_peers():
-    if not os.path.exists(PEERS_FILE): return []
-    try:
-        peers = json.load(open(PEERS_FILE))
-        out=[]; now=datetime.utcnow()
-        for p in peers:
-            try:
-                ls=datetime.fromisoformat(p.get("last_seen"))
-                if (now-ls) <= timedelta(days=CLEANUP_DAYS): out.append(p)
-            except Exception: pass
-        return out
-    except Exception: return []
+    return PEERS.snapshot()
 
 def save_peers(peers):
-    try: json.dump(peers, open(PEERS_FILE, "w"), indent=2)
+    try: PEERS.replace_all(peers)
     except Exception: pass
 
 def update_peer_status(node_id, status, host=None, port=None):
-    peers = load_peers()
-    now = datetime.utcnow().isoformat()
-    found=False
-    for p in peers:
-        if p.get("node_id")==node_id:
-            p["status"]=status
-            if status=="active": p["last_seen"]=now; p["retries"]=0
-            else: p["retries"]=p.get("retries",0)+1
-            if host: p["host"]=host
-            if port: p["port"]=port
-            found=True; break
-    if not found and status=="active" and host and port:
-        peers.append({"node_id":node_id,"host":host,"port":port,"status":"active","last_seen":now,"retries":0})
-    peers = [p for p in peers if p.get("retries",0) <= RETRY_LIMIT]
-    save_peers(peers)
+    PEERS.update(node_id, status, host, port)
 
 def cleanup_peers(days=CLEANUP_DAYS):
-    peers = load_peers()
-    now = datetime.utcnow()
-    keep = []
-    for p in peers:
-        try:
-            ls = datetime.fromisoformat(p.get("last_seen", now.isoformat()))
-            if (now - ls).days <= days:
-                keep.append(p)
-        except Exception:
-            pass
-    save_peers(keep)
+    PEERS.cleanup(days)
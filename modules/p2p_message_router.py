@@ -1,4 +1,6 @@
-import asyncio, json
+import asyncio, json, time
+from collections import OrderedDict
+from concurrent.futures import Future
 try:
     from modules.p2p_layer import P2PLayer, KADEMLIA_AVAILABLE
 except Exception:
@@ -10,23 +12,153 @@ def _ensure_bytes(obj):
     if isinstance(obj,str): return obj.encode()
     return json.dumps(obj).encode()
 
+def _done(result):
+    f=Future(); f.set_result(result); return f
+
 class P2PMessageRouter:
-    def __init__(self, p2p_layer: P2PLayer):
+    # Per-topic send queue on the P2P loop: a queued write is replaced by a newer one (both
+    # futures get its result), max_inflight sets run at once, max_pending topics may wait.
+    # Reads: per-topic TTL cache (shorter for misses); concurrent lookups share one round trip.
+    def __init__(self, p2p_layer: P2PLayer, max_inflight=8, max_pending=1024, op_timeout=10.0,
+                 read_ttl=30.0, negative_ttl=5.0, cache_size=4096):
         self.p2p_layer = p2p_layer
+        self.max_inflight = max_inflight; self.max_pending = max_pending; self.op_timeout = op_timeout
+        self._pending = {}     # topic -> [payload, [futures], enqueued_at]; touched only on the loop
+        self._order = []       # topics ready to start, FIFO
+        self._inflight = set()
+        self.read_ttl = read_ttl; self.negative_ttl = negative_ttl; self.cache_size = cache_size
+        self.ttls = {}                # topic -> TTL override
+        self._rcache = OrderedDict()  # topic -> (expires_at, value); loop only
+        self._rflight = {}            # topic -> asyncio.Future of the lookup in progress
+        self._subs = {}               # topic -> [task, [callbacks]]
+        self.stats = {"queued":0,"coalesced":0,"sent":0,"failed":0,"rejected":0,
+                      "queue_depth":0,"inflight":0,"last_latency":0.0,"avg_latency":0.0,"max_latency":0.0,
+                      "read_hits":0,"read_negative_hits":0,"read_joined":0,"read_lookups":0}
 
-    def send_message(self, topic: str, message: dict):
-        if not KADEMLIA_AVAILABLE or not getattr(self.p2p_layer, 'server', None):
-            return
-        coro = self.p2p_layer.server.set(topic, _ensure_bytes(message))
-        asyncio.run_coroutine_threadsafe(coro, self.p2p_layer.loop)
+    def _available(self):
+        return KADEMLIA_AVAILABLE and getattr(self.p2p_layer, 'server', None) and getattr(self.p2p_layer, 'loop', None)
 
-    async def receive_message(self, topic: str):
-        if not KADEMLIA_AVAILABLE or not getattr(self.p2p_layer, 'server', None):
-            return None
-        res = await self.p2p_layer.server.get(topic)
+    def send_message(self, topic: str, message, callback=None) -> Future:
+        # Returns a Future resolving to True once the DHT store finished (False on failure).
+        if not self._available():
+            fut = _done(False)
+        else:
+            fut = Future()
+            self.p2p_layer.loop.call_soon_threadsafe(self._enqueue, topic, _ensure_bytes(message), fut)
+        if callback: fut.add_done_callback(callback)
+        return fut
+
+    # --- everything below runs on the P2P loop ---
+    def _enqueue(self, topic, payload, fut):
+        self._rcache.pop(topic, None)  # our own write makes any cached read stale
+        slot = self._pending.get(topic)
+        if slot is not None:
+            slot[0] = payload; slot[1].append(fut); self.stats["coalesced"] += 1
+        elif len(self._pending) >= self.max_pending:
+            self.stats["rejected"] += 1
+            fut.set_exception(RuntimeError("p2p send queue full")); return
+        else:
+            self._pending[topic] = [payload, [fut], time.monotonic()]
+            if topic not in self._inflight: self._order.append(topic)
+        self.stats["queued"] += 1
+        self._pump()
+
+    def _pump(self):
+        while self._order and len(self._inflight) < self.max_inflight:
+            topic = self._order.pop(0)
+            payload, futs, t0 = self._pending.pop(topic)
+            self._inflight.add(topic)
+            asyncio.ensure_future(self._store(topic, payload, futs, t0))
+        self.stats["queue_depth"] = len(self._pending); self.stats["inflight"] = len(self._inflight)
+
+    async def _store(self, topic, payload, futs, t0):
+        try:
+            ok = bool(await asyncio.wait_for(self.p2p_layer.server.set(topic, payload), self.op_timeout))
+        except Exception:
+            ok = False
+        dt = time.monotonic() - t0
+        s = self.stats
+        s["sent" if ok else "failed"] += 1
+        s["last_latency"] = dt; s["max_latency"] = max(s["max_latency"], dt)
+        s["avg_latency"] = dt if not s["avg_latency"] else 0.9*s["avg_latency"] + 0.1*dt
+        for f in futs:
+            if not f.done(): f.set_result(ok)
+        self._inflight.discard(topic)
+        if topic in self._pending: self._order.append(topic)  # rewritten while we were storing
+        self._pump()
+
+    def set_ttl(self, topic, ttl):
+        self.ttls[topic] = ttl
+
+    async def _lookup(self, topic):
+        self.stats["read_lookups"] += 1
+        try: res = await asyncio.wait_for(self.p2p_layer.server.get(topic), self.op_timeout)
+        except Exception: return None
         if res is None: return None
         try:
             s = res.decode() if isinstance(res,(bytes,bytearray)) else res
             return json.loads(s)
         except Exception:
             return None
+
+    async def receive_message(self, topic: str, fresh=False):
+        if not KADEMLIA_AVAILABLE or not getattr(self.p2p_layer, 'server', None):
+            return None
+        now = time.monotonic()
+        hit = None if fresh else self._rcache.get(topic)
+        if hit is not None and hit[0] > now:
+            self._rcache.move_to_end(topic)
+            self.stats["read_hits" if hit[1] is not None else "read_negative_hits"] += 1
+            return hit[1]
+        fut = self._rflight.get(topic)
+        if fut is not None:
+            self.stats["read_joined"] += 1
+            return await asyncio.shield(fut)
+        fut = self._rflight[topic] = asyncio.get_running_loop().create_future()
+        try:
+            val = await self._lookup(topic)
+            ttl = self.ttls.get(topic, self.read_ttl) if val is not None else self.negative_ttl
+            self._rcache[topic] = (time.monotonic() + ttl, val); self._rcache.move_to_end(topic)
+            while len(self._rcache) > self.cache_size: self._rcache.popitem(last=False)
+            fut.set_result(val)
+            return val
+        except BaseException as e:
+            fut.set_exception(e); raise
+        finally:
+            self._rflight.pop(topic, None)
+
+    def get(self, topic, timeout=None, fresh=False):
+        # Blocking read for non-loop threads.
+        if not self._available(): return None
+        cf = asyncio.run_coroutine_threadsafe(self.receive_message(topic, fresh), self.p2p_layer.loop)
+        return cf.result(timeout if timeout is not None else self.op_timeout + 1)
+
+    def subscribe(self, topic, callback, interval=None):
+        # Keeps `topic` warm: refreshed in the background every `interval` (default: its TTL),
+        # calling callback(value) whenever the value changes. Returns an unsubscribe function.
+        if not self._available(): return lambda: None
+        loop = self.p2p_layer.loop
+        def _add():
+            sub = self._subs.get(topic)
+            if sub is None:
+                sub = self._subs[topic] = [None, []]
+                sub[0] = asyncio.ensure_future(self._poll(topic, interval))
+            sub[1].append(callback)
+        def _remove():
+            sub = self._subs.get(topic)
+            if not sub: return
+            if callback in sub[1]: sub[1].remove(callback)
+            if not sub[1]: sub[0].cancel(); self._subs.pop(topic, None)
+        loop.call_soon_threadsafe(_add)
+        return lambda: loop.call_soon_threadsafe(_remove)
+
+    async def _poll(self, topic, interval):
+        last = object()
+        while True:
+            val = await self.receive_message(topic, fresh=True)
+            if val != last:
+                last = val
+                for cb in list(self._subs.get(topic, [None, []])[1]):
+                    try: cb(val)
+                    except Exception: pass
+            await asyncio.sleep(interval or self.ttls.get(topic, self.read_ttl))
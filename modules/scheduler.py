@@ -0,0 +1,139 @@
+import time, heapq, random, threading, itertools
+from concurrent.futures import ThreadPoolExecutor
+from modules.error_logger import log_error
+
+class Job:
+    # interval: seconds or a callable giving the next delay. mode: "delay" (after the last
+    # run finished), "rate" (fixed grid) or "once". Rate mode only: overlap = skip | queue |
+    # allow a run due while the last is still going; missed = skip | catchup slots fallen behind.
+    def __init__(self, sched, name, fn, interval, jitter=0.0, mode="delay", overlap="skip", missed="skip"):
+        if mode not in ("delay", "rate", "once"): raise ValueError(f"mode: {mode}")
+        if overlap not in ("skip", "queue", "allow"): raise ValueError(f"overlap: {overlap}")
+        if missed not in ("skip", "catchup"): raise ValueError(f"missed: {missed}")
+        self._sched=sched; self.name=name; self.fn=fn; self.interval=interval; self.jitter=jitter
+        self.mode=mode; self.overlap=overlap; self.missed=missed
+        self.cancelled=False; self.running=0; self._queued=False; self.next_run=None; self._slot=None
+        self.stats={"runs":0,"errors":0,"skipped":0,"missed":0,"last_error":None,"last_start":None,
+                    "last_duration":0.0,"total_time":0.0,"max_duration":0.0}
+
+    def period(self):
+        return max(0.0, float(self.interval() if callable(self.interval) else self.interval))
+
+    def jitter_for(self, d):
+        # +-jitter fraction of d; spreads jobs that were registered together
+        return d*self.jitter*(2*self._sched.rng.random()-1) if self.jitter else 0.0
+
+    def cancel(self):
+        self.cancelled=True
+        if self._sched.jobs.get(self.name) is self: self._sched.jobs.pop(self.name, None)
+        self._sched._wake()
+
+    def as_dict(self):
+        return {"name":self.name, "mode":self.mode, "running":self.running, "cancelled":self.cancelled,
+                "next_in":None if self.next_run is None else round(self.next_run-time.monotonic(), 3), **self.stats}
+
+class Scheduler:
+    # One timer thread over a heap of (due, seq, job) feeding a small worker pool.
+    def __init__(self, workers=4, rng=None):
+        self.workers=workers; self.rng=rng or random.Random()
+        self._heap=[]; self._seq=itertools.count(); self._cv=threading.Condition()
+        self._pool=None; self._thread=None; self._stop=False
+        self.jobs={}
+
+    def every(self, name, fn, interval, jitter=0.0, mode="delay", overlap="skip", missed="skip", first=None):
+        # first: seconds until the first run; defaults to one interval, like the
+        # sleep-first loops this replaces. Re-using a name replaces that job.
+        self.cancel(name)
+        job=Job(self, name, fn, interval, jitter, mode, overlap, missed)
+        d=job.period() if first is None else first
+        job._slot=time.monotonic()+d
+        with self._cv:
+            self.jobs[name]=job
+            self._push(job, job._slot+job.jitter_for(d))
+            self._ensure_started()
+        return job
+
+    def once(self, name, fn, delay):
+        # one-shot job; re-using a name replaces (re-arms) a pending one
+        return self.every(name, fn, delay, mode="once")
+
+    def cancel(self, name):
+        job=self.jobs.get(name)
+        if job: job.cancel()
+        return job is not None
+
+    def stats(self):
+        return {name: j.as_dict() for name, j in list(self.jobs.items())}
+
+    def shutdown(self, wait=False):
+        with self._cv:
+            self._stop=True; self._cv.notify_all()
+        if self._pool: self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # --- internals ---
+    def _ensure_started(self):
+        if self._thread is None:
+            self._pool=ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sched")
+            self._thread=threading.Thread(target=self._timer, name="Scheduler", daemon=True); self._thread.start()
+
+    def _push(self, job, due):
+        job.next_run=due; heapq.heappush(self._heap, (due, next(self._seq), job)); self._cv.notify()
+
+    def _wake(self):
+        with self._cv: self._cv.notify()
+
+    def _timer(self):
+        with self._cv:
+            while not self._stop:
+                if not self._heap: self._cv.wait(); continue
+                due, _, job=self._heap[0]
+                if job.cancelled: heapq.heappop(self._heap); continue
+                now=time.monotonic()
+                if due > now: self._cv.wait(due-now); continue
+                heapq.heappop(self._heap); job.next_run=None
+                self._dispatch(job, now)
+
+    def _dispatch(self, job, now):
+        # Called with the lock held.
+        if job.mode=="rate":
+            # the grid itself carries no jitter, so it does not drift
+            step=job.period(); slot=job._slot+step
+            if slot <= now and job.missed=="skip":
+                n=int((now-slot)//max(step, 1e-3))+1
+                job.stats["missed"]+=n; slot+=n*step
+            job._slot=slot
+            self._push(job, slot+job.jitter_for(step))
+            if job.running and job.overlap!="allow":
+                if job.overlap=="queue": job._queued=True
+                else: job.stats["skipped"]+=1
+                return
+        job.running+=1
+        self._pool.submit(self._run, job)
+
+    def _run(self, job):
+        t0=time.monotonic(); job.stats["last_start"]=time.time()
+        try: job.fn()
+        except Exception as e:
+            job.stats["errors"]+=1; job.stats["last_error"]=f"{type(e).__name__}: {e}"
+            log_error(job.name, e)
+        dt=time.monotonic()-t0
+        with self._cv:
+            s=job.stats; s["runs"]+=1; s["last_duration"]=dt; s["total_time"]+=dt; s["max_duration"]=max(s["max_duration"], dt)
+            job.running-=1
+            if job.cancelled or self._stop: return
+            if job.mode=="once":
+                if self.jobs.get(job.name) is job: del self.jobs[job.name]
+            elif job.mode=="delay":
+                d=job.period(); job._slot=time.monotonic()+d; self._push(job, job._slot+job.jitter_for(d))
+            elif job._queued:
+                job._queued=False; job.running+=1
+                self._pool.submit(self._run, job)
+
+_SCHEDULER=None
+_lock=threading.Lock()
+def get_scheduler():
+    # process-wide scheduler for the legacy start() defaults; size your own with Scheduler(workers)
+    global _SCHEDULER
+    with _lock:
+        if _SCHEDULER is None: _SCHEDULER=Scheduler()
+        return _SCHEDULER
@@ -0,0 +1,121 @@
+import re, math, sqlite3, itertools, threading
+from datetime import datetime
+from collections import OrderedDict
+from modules.error_logger import log_error
+
+DOC_DDL = "CREATE VIRTUAL TABLE IF NOT EXISTS doc_fts USING fts5(kind UNINDEXED, ref UNINDEXED, body, ts UNINDEXED, tokenize='porter unicode61')"
+CACHE_SIZE = 256
+MAX_TERMS = 6         # longest terms kept from a question
+MIN_MATCH = 0.6       # share of those terms a hit must contain
+STOPWORDS = frozenset("""a an and are as at be but by can could did do does for from had has have how i if in into is it its
+me my no not of on or our so than that the their them then there these they this to was we were what when where which
+who whom why will with would you your co czy jak jest i w z na do to nie się o że""".split())
+
+def _terms(q):
+    terms=[t for t in dict.fromkeys(re.findall(r"\w+", str(q).lower())) if t not in STOPWORDS and len(t) > 1]
+    return sorted(terms, key=len, reverse=True)[:MAX_TERMS]
+
+def _match_expr(q):
+    # Free text -> quoted terms (never parsed as FTS syntax), stopwords dropped; a hit
+    # must contain ceil(MIN_MATCH * n) of the n terms: OR over the AND of each such subset.
+    terms=_terms(q)
+    if not terms: return ""
+    k=max(1, math.ceil(MIN_MATCH*len(terms)))
+    groups=[" AND ".join(f'"{t}"' for t in combo) for combo in itertools.combinations(terms, k)]
+    return groups[0] if len(groups)==1 else " OR ".join(f"({g})" for g in groups)
+
+def _now(): return datetime.utcnow().isoformat()
+
+class SearchIndex:
+    # BM25-ranked search over memory entries (mem_fts, kept in sync by triggers in
+    # MemoryStore) and over skills / tutor turns / long-term notes (doc_fts), all
+    # inside memory.db. Recent results are cached until the next committed write.
+    def __init__(self, store, cache_size=CACHE_SIZE):
+        self.store=store; self.cache_size=cache_size
+        self._cache=OrderedDict(); self._lock=threading.Lock(); self._docs_gen=0
+        self.stats={"queries":0,"hits":0}
+        self.fts=False
+        try:
+            c=store.connection(); c.execute(DOC_DDL)
+            if "ts" not in [r[1] for r in c.execute("PRAGMA table_info(doc_fts)")]: self._migrate(c)
+            c.commit(); self.fts=True
+        except sqlite3.OperationalError as e:  # sqlite built without FTS5: doc search is off
+            log_error("SearchIndex", e)
+
+    @staticmethod
+    def _migrate(c):
+        # doc_fts from before the ts column: copy into the new layout, stamped now
+        c.execute(DOC_DDL.replace("doc_fts", "doc_fts_new"))
+        c.execute("INSERT INTO doc_fts_new(kind, ref, body, ts) SELECT kind, ref, body, ? FROM doc_fts", (_now(),))
+        c.execute("DROP TABLE doc_fts"); c.execute("ALTER TABLE doc_fts_new RENAME TO doc_fts")
+
+    def add(self, kind, ref, text):
+        if not self.fts: return
+        c=self.store.connection()
+        c.execute("INSERT INTO doc_fts(kind, ref, body, ts) VALUES (?,?,?,?)", (kind, str(ref), str(text), _now()))
+        c.commit(); self._docs_gen+=1
+
+    def replace_kind(self, kind, docs):
+        if not self.fts: return
+        c=self.store.connection(); now=_now()
+        c.execute("DELETE FROM doc_fts WHERE kind = ?", (kind,))
+        c.executemany("INSERT INTO doc_fts(kind, ref, body, ts) VALUES (?,?,?,?)", ((kind, str(r), str(t), now) for r, t in docs))
+        c.commit(); self._docs_gen+=1
+
+    def remove(self, kind, ref, text):
+        if not self.fts: return
+        c=self.store.connection()
+        if c.execute("DELETE FROM doc_fts WHERE kind = ? AND ref = ? AND body = ?", (kind, str(ref), str(text))).rowcount:
+            c.commit(); self._docs_gen+=1
+
+    def expire(self, cutoff_ts, kinds=("tutor",)):
+        # retention for append-only kinds; MemoryCompactor calls this with its cutoff
+        if not self.fts: return 0
+        c=self.store.connection()
+        n=c.execute(f"DELETE FROM doc_fts WHERE ts < ? AND kind IN ({','.join('?'*len(kinds))})", (cutoff_ts, *kinds)).rowcount
+        c.commit()
+        if n: self._docs_gen+=1
+        return n
+
+    def attach_skills(self, skill_store):
+        # Skills live in their own log; mirror them here and follow appends/compactions.
+        reindex=lambda: self.replace_kind("skill", ((r["concept"], f'{r["concept"]} {r["rule"]}') for r in skill_store.all()))
+        def on_change(event, rec):
+            if event=="add": self.add("skill", rec["concept"], f'{rec["concept"]} {rec["rule"]}')
+            elif event=="evict": self.remove("skill", rec["concept"], f'{rec["concept"]} {rec["rule"]}')
+            elif event=="compact": reindex()
+        reindex(); skill_store.listeners.append(on_change)
+
+    def search(self, q, kinds=None, limit=10, min_score=0.0):
+        # min_score: BM25 floor; hits carried only by terms common to most documents score ~0
+        expr=_match_expr(q)
+        if not expr: return []
+        kinds=tuple(kinds) if kinds else None
+        key=(expr, kinds, limit, min_score); gen=(self.store.committed, self._docs_gen)
+        with self._lock:
+            self.stats["queries"]+=1
+            hit=self._cache.get(key)
+            if hit and hit[0]==gen:
+                self._cache.move_to_end(key); self.stats["hits"]+=1
+                return list(hit[1])
+        out=[h for h in self._query(expr, kinds, limit) if h["score"] >= min_score]
+        with self._lock:
+            self._cache[key]=(gen, out); self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size: self._cache.popitem(last=False)
+        return list(out)
+
+    def _query(self, expr, kinds, limit):
+        c=self.store.connection(); parts=[]; args=[]
+        if self.store.fts and (kinds is None or "memory" in kinds):
+            parts.append("SELECT 'memory', m.id, m.payload_json, f.rank FROM (SELECT rowid, rank FROM mem_fts "
+                         "WHERE mem_fts MATCH ? ORDER BY rank LIMIT ?) f JOIN mem_entries m ON m.rowid = f.rowid")
+            args.extend((expr, limit))
+        doc_kinds=None if kinds is None else [k for k in kinds if k!="memory"]
+        if self.fts and (doc_kinds is None or doc_kinds):
+            where="doc_fts MATCH ?"; args.append(expr)
+            if doc_kinds: where+=f" AND kind IN ({','.join('?'*len(doc_kinds))})"; args.extend(doc_kinds)
+            parts.append(f"SELECT * FROM (SELECT kind, ref, body, rank FROM doc_fts WHERE {where} ORDER BY rank LIMIT ?)")
+            args.append(limit)
+        if not parts: return []
+        rows=c.execute(" UNION ALL ".join(parts)+" ORDER BY 4 LIMIT ?", (*args, limit)).fetchall()
+        return [{"kind":k, "ref":r, "text":t, "score":-s} for k, r, t, s in rows]
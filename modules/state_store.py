@@ -0,0 +1,93 @@
+import time, threading
+from collections.abc import Mapping
+from modules.error_logger import log_error
+
+class Snapshot(Mapping):
+    # Immutable view of the state at one version; safe to hold and read without locks.
+    __slots__=("version", "_d")
+    def __init__(self, version, d): self.version=version; self._d=d
+    def __getitem__(self, k): return self._d[k]
+    def __iter__(self): return iter(self._d)
+    def __len__(self): return len(self._d)
+    def get(self, k, default=None): return self._d.get(k, default)
+    def as_dict(self): return dict(self._d)
+    def __repr__(self): return f"Snapshot(v{self.version}, {self._d!r})"
+
+class _Sub:
+    __slots__=("fn", "keys", "coalesce", "pending", "due", "active")
+    def __init__(self, fn, keys, coalesce):
+        self.fn=fn; self.keys=frozenset(keys) if keys else None; self.coalesce=coalesce
+        self.pending=set(); self.due=None; self.active=True
+
+class StateStore(Mapping):
+    # Copy-on-write versioned state; readers take the current Snapshot without locking.
+    # Subscribers run on one notifier thread with the keys changed since their last call.
+    def __init__(self, initial=None):
+        self._snap=Snapshot(0, dict(initial or {}))
+        self._lock=threading.Lock(); self._cv=threading.Condition(self._lock)
+        self._subs=[]; self._thread=None
+        self.stats={"updates":0,"noops":0,"notified":0}
+
+    # --- reads (lock-free) ---
+    def snapshot(self): return self._snap
+    @property
+    def version(self): return self._snap.version
+    def __getitem__(self, k): return self._snap[k]
+    def __iter__(self): return iter(self._snap)
+    def __len__(self): return len(self._snap)
+    def get(self, k, default=None): return self._snap.get(k, default)
+
+    # --- writes ---
+    def update(self, changes=None, **kw):
+        # Applies only keys whose value actually differs; returns the changed keys.
+        changes={**(changes or {}), **kw}
+        with self._lock:
+            cur=self._snap._d
+            diff={k: v for k, v in changes.items() if k not in cur or cur[k]!=v}
+            if not diff:
+                self.stats["noops"]+=1; return set()
+            self._snap=Snapshot(self._snap.version+1, {**cur, **diff})
+            self.stats["updates"]+=1
+            keys=set(diff); now=time.monotonic()
+            for s in self._subs:
+                hit=keys if s.keys is None else keys & s.keys
+                if not hit: continue
+                s.pending|=hit
+                if s.due is None: s.due=now+s.coalesce
+            if self._subs: self._cv.notify()
+        return keys
+
+    def __setitem__(self, k, v): self.update({k: v})
+
+    # --- subscriptions ---
+    def subscribe(self, fn, keys=None, coalesce=0.0):
+        # fn(changed_keys, snapshot); keys limits which keys wake it up.
+        sub=_Sub(fn, keys, coalesce)
+        with self._lock:
+            self._subs.append(sub)
+            if self._thread is None:
+                self._thread=threading.Thread(target=self._notify_loop, name="StateNotify", daemon=True); self._thread.start()
+        def unsubscribe():
+            with self._lock:
+                sub.active=False
+                if sub in self._subs: self._subs.remove(sub)
+        return unsubscribe
+
+    def _notify_loop(self):
+        while True:
+            with self._lock:
+                while True:
+                    now=time.monotonic()
+                    due=[s for s in self._subs if s.due is not None and s.due <= now]
+                    if due: break
+                    waits=[s.due for s in self._subs if s.due is not None]
+                    self._cv.wait(min(waits)-now if waits else None)
+                batch=[]
+                for s in due:
+                    batch.append((s, s.pending)); s.pending=set(); s.due=None
+                snap=self._snap
+            for s, keys in batch:
+                if not s.active: continue
+                try: s.fn(keys, snap)
+                except Exception as e: log_error("StateStore", e)
+                self.stats["notified"]+=1
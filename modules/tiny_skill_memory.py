@@ -1,9 +1,112 @@
-import json, time, os
-FILE = "skills.json"
+import json, time, os, threading
+from modules.error_logger import log_error
+FILE = "skills.json"          # legacy whole-file store, migrated on first open
+LOG_FILE = "skills.jsonl"
+MAX_PER_CONCEPT = 20          # records kept per concept when the log is compacted
+COMPACT_RATIO = 2.0
+
+def _key(concept): return " ".join(str(concept).lower().split())
+
+class SkillStore:
+    # Append-only JSONL log plus an in-memory index: concept -> records sorted by score (best first).
+    def __init__(self, path=LOG_FILE, legacy_path=FILE, max_per_concept=MAX_PER_CONCEPT, compact_ratio=COMPACT_RATIO):
+        self.path=path; self.max_per_concept=max_per_concept; self.compact_ratio=compact_ratio
+        self._lock=threading.RLock(); self._index={}; self._lines=0; self._size=0
+        self.version=0; self.listeners=[]  # fn(event, rec) with event in ("add", "evict", "compact")
+        if legacy_path and os.path.exists(legacy_path) and not os.path.exists(path):
+            self._migrate(legacy_path)
+        self._load()
+
+    def _migrate(self, legacy_path):
+        try: data=json.load(open(legacy_path))
+        except Exception: data=[]
+        tmp=self.path+".tmp"
+        with open(tmp, "w") as f:
+            for r in data: f.write(json.dumps(r, separators=(",",":"))+"\n")
+        os.replace(tmp, self.path)
+        os.replace(legacy_path, legacy_path+".migrated")
+
+    def _load(self):
+        if not os.path.exists(self.path): return
+        with open(self.path) as f:
+            for line in f:
+                try: self._index_record(json.loads(line))
+                except Exception: continue  # torn trailing line from a crashed writer
+                self._lines+=1
+
+    def _slot(self, recs, score):
+        # newer records win ties; None when the concept is full of better ones
+        i=len(recs)
+        while i and float(recs[i-1].get("score", 0)) <= score: i-=1
+        return i if i < self.max_per_concept else None
+
+    def _index_record(self, rec):
+        # returns the record pushed out of the concept's list, if any
+        recs=self._index.setdefault(_key(rec["concept"]), [])
+        i=self._slot(recs, float(rec.get("score", 0)))
+        if i is None: return rec
+        recs.insert(i, rec)
+        if len(recs) > self.max_per_concept: return recs.pop()
+        self._size+=1
+
+    def add(self, concept, rule, score):
+        # None when a full concept only holds better-scored rules: nothing is logged or announced
+        rec={"concept": concept, "rule": rule, "score": score, "timestamp": time.time()}
+        line=json.dumps(rec, separators=(",",":"))+"\n"
+        with self._lock:
+            if self._slot(self._index.get(_key(concept), ()), float(score)) is None: return None
+            with open(self.path, "a") as f: f.write(line)
+            evicted=self._index_record(rec); self._lines+=1; self.version+=1
+            if evicted is not None: self._notify("evict", evicted)
+            self._notify("add", rec)
+            if self._lines > max(64, self.compact_ratio*self._size): self.compact()
+        return rec
+
+    def _notify(self, event, rec):
+        for fn in list(self.listeners):
+            try: fn(event, rec)
+            except Exception as e: log_error("SkillStore", e)
+
+    def compact(self):
+        # Rewrite the log with only the indexed records; temp file + rename keeps it crash-safe.
+        with self._lock:
+            recs=sorted((r for rs in self._index.values() for r in rs), key=lambda r: r.get("timestamp", 0))
+            tmp=self.path+".tmp"
+            with open(tmp, "w") as f:
+                for r in recs: f.write(json.dumps(r, separators=(",",":"))+"\n")
+            os.replace(tmp, self.path)
+            self._lines=self._size=len(recs)
+            self._notify("compact", None)
+
+    def query(self, concept, limit=None):
+        with self._lock: recs=list(self._index.get(_key(concept), ()))
+        return recs[:limit] if limit else recs
+
+    def best(self, concept):
+        recs=self._index.get(_key(concept))
+        return recs[0] if recs else None
+
+    def all(self):
+        with self._lock: return [r for rs in self._index.values() for r in rs]
+
+    def __len__(self): return self._size
+
+_store=None; _store_lock=threading.Lock()
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None: _store=SkillStore()
+    return _store
+
 def update_skill(concept, rule, score):
-    data = []
-    if os.path.exists(FILE):
-        data = json.load(open(FILE))
-    data.append({"concept": concept, "rule": rule, "score": score, "timestamp": time.time()})
-    json.dump(data, open(FILE, "w"))
-def query_skill(q): return []
+    return get_store().add(concept, rule, score)
+
+_search=None
+def set_search(index):
+    global _search; _search=index
+def query_skill(q, limit=10):
+    # Exact concept first; otherwise ranked full-text over every skill rule.
+    recs=get_store().query(q, limit)
+    if recs or _search is None: return recs
+    return [{"concept": h["ref"], "rule": h["text"], "score": h["score"]} for h in _search.search(q, kinds=("skill",), limit=limit)]
@@ -1 +1,86 @@
-def translate(text, lang): return text
+import os, re, sqlite3, hashlib, threading
+from collections import OrderedDict
+from modules.error_logger import log_error
+
+_LETTERS = re.compile(r"[^\W\d_]")
+
+def _key(text, lang):
+    return f"{lang}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+class Translator:
+    # engine(texts, lang, src) -> translations, called once per batch with only the strings
+    # missing from the LRU (and the optional SQLite table at `path`); no engine: identity.
+    def __init__(self, engine=None, cache_size=4096, path=None):
+        self.engine = engine; self.cache_size = cache_size
+        self._memo = OrderedDict(); self._lock = threading.Lock(); self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self.stats = {"skipped": 0, "hits": 0, "disk": 0, "translated": 0, "batches": 0, "errors": 0}
+
+    def translate(self, text, lang, src=None):
+        return self.translate_many([text], lang, src)[0]
+
+    def translate_many(self, texts, lang, src=None):
+        out = list(texts)
+        if self.engine is None or not lang or src == lang:
+            self.stats["skipped"] += len(out); return out
+        todo = {}  # key -> (text, [positions])
+        with self._lock:
+            for i, t in enumerate(out):
+                if not t or not _LETTERS.search(t):
+                    self.stats["skipped"] += 1; continue
+                k = _key(t, lang)
+                if k in self._memo:
+                    self._memo.move_to_end(k); out[i] = self._memo[k]; self.stats["hits"] += 1
+                else:
+                    todo.setdefault(k, (t, []))[1].append(i)
+            if todo and self._db is not None:
+                keys = list(todo)
+                for j in range(0, len(keys), 500):
+                    chunk = keys[j:j+500]
+                    for k, v in self._db.execute(f"SELECT key, text FROM translations WHERE key IN ({','.join('?'*len(chunk))})", chunk):
+                        for i in todo.pop(k)[1]: out[i] = v
+                        self._remember(k, v); self.stats["disk"] += 1
+        if not todo: return out
+        keys = list(todo)
+        try:
+            res = self.engine([todo[k][0] for k in keys], lang, src)
+            self.stats["batches"] += 1
+        except Exception as e:
+            log_error("Translator", e); self.stats["errors"] += 1
+            return out  # untranslated is better than no answer; not memoized
+        with self._lock:
+            for k, v in zip(keys, res):
+                for i in todo[k][1]: out[i] = v
+                self._remember(k, v)
+            self.stats["translated"] += len(keys)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO translations VALUES (?,?)", zip(keys, res)); self._db.commit()
+        return out
+
+    def translate_doc(self, text, lang, src=None):
+        # per paragraph, so a refetched article only pays for the paragraphs that changed
+        return "\n\n".join(self.translate_many(text.split("\n\n"), lang, src))
+
+    def _remember(self, k, v):
+        self._memo[k] = v
+        while len(self._memo) > self.cache_size: self._memo.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None: self._db.close(); self._db = None
+
+_TRANSLATOR = None
+def get_translator(**kw):
+    global _TRANSLATOR
+    if _TRANSLATOR is None: _TRANSLATOR = Translator(**kw)
+    return _TRANSLATOR
+
+def set_engine(engine):
+    get_translator().engine = engine
+
+def translate(text, lang, src=None): return get_translator().translate(text, lang, src)
+def translate_many(texts, lang, src=None): return get_translator().translate_many(texts, lang, src)
@@ -0,0 +1,99 @@
+import os, json, time, sqlite3, threading
+from modules.error_logger import log_error
+
+DDL = """
+CREATE TABLE IF NOT EXISTS web_cache (
+  key TEXT PRIMARY KEY, value_json TEXT NOT NULL, fetched REAL NOT NULL, used REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_web_used ON web_cache (used);
+"""
+TOUCH_EVERY = 60.0  # LRU recency is only rewritten once a minute per key
+
+def normalize(q):
+    return " ".join(str(q).lower().split())
+
+class _Flight:
+    __slots__=("done", "value")
+    def __init__(self): self.done=threading.Event(); self.value=None
+
+class WebCache:
+    # SQLite cache keyed "<ns>:<normalized query>", fresh for `ttl`; expired rows are kept
+    # as stale fallbacks until LRU eviction. Concurrent misses share one fetch.
+    def __init__(self, path="web_cache.db", ttl=86400, max_entries=5000, wait=30.0):
+        self.path=path; self.ttl=ttl; self.max_entries=max(1, int(max_entries)); self.wait=wait
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db=sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL"); self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(DDL)
+        self._lock=threading.Lock(); self._flights={}
+        self._n=self._db.execute("SELECT COUNT(*) FROM web_cache").fetchone()[0]
+        self.stats={"hits":0,"stale":0,"misses":0,"fetches":0,"shared":0,"errors":0,"evicted":0}
+
+    def _get(self, key):
+        with self._lock:
+            row=self._db.execute("SELECT value_json, fetched, used FROM web_cache WHERE key=?", (key,)).fetchone()
+            if row is None: return None
+            now=time.time()
+            if now - row[2] > TOUCH_EVERY:
+                self._db.execute("UPDATE web_cache SET used=? WHERE key=?", (now, key)); self._db.commit()
+        return json.loads(row[0]), now - row[1] < self.ttl
+
+    def get(self, q, ns="", allow_stale=False):
+        hit=self._get(f"{ns}:{normalize(q)}")
+        return hit[0] if hit and (hit[1] or allow_stale) else None
+
+    def put(self, q, value, ns=""):
+        self._put(f"{ns}:{normalize(q)}", value)
+
+    def _put(self, key, value):
+        now=time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO web_cache VALUES (?,?,?,?)", (key, json.dumps(value), now, now))
+            # a REPLACE doesn't grow the table; recount exactly only when near the cap
+            self._n=self._db.execute("SELECT COUNT(*) FROM web_cache").fetchone()[0] if self._n >= self.max_entries else self._n+1
+            if self._n > self.max_entries:
+                # evict a tenth at once so steady-state inserts don't pay for a DELETE each
+                drop=self._n - self.max_entries + self.max_entries//10
+                self._db.execute("DELETE FROM web_cache WHERE key IN (SELECT key FROM web_cache ORDER BY used LIMIT ?)", (drop,))
+                self._n-=drop; self.stats["evicted"]+=drop
+            self._db.commit()
+
+    def fetch(self, q, fn, ns="", offline=False):
+        # fn(q) -> value or None. Fresh hit -> cached value; offline -> cached value
+        # (stale or not) or None; otherwise one caller fetches and the rest wait for it.
+        key=f"{ns}:{normalize(q)}"
+        hit=self._get(key)
+        if hit and hit[1]:
+            self.stats["hits"]+=1; return hit[0]
+        if offline:
+            if hit: self.stats["stale"]+=1
+            return hit[0] if hit else None
+        with self._lock:
+            fl=self._flights.get(key); lead=fl is None
+            if lead: fl=self._flights[key]=_Flight()
+        if not lead:
+            self.stats["shared"]+=1
+            fl.done.wait(self.wait); return fl.value
+        self.stats["misses"]+=1
+        try:
+            self.stats["fetches"]+=1
+            value=fn(q)
+            if value is not None: self._put(key, value)
+            elif hit: self.stats["stale"]+=1; value=hit[0]
+        except Exception as e:
+            log_error("WebCache", e); self.stats["errors"]+=1
+            value=hit[0] if hit else None
+        finally:
+            with self._lock: self._flights.pop(key, None)
+        fl.value=value; fl.done.set()
+        return value
+
+    def __len__(self): return self._n
+
+    def close(self):
+        with self._lock: self._db.close()
+
+_CACHE=None
+def get_cache(**kw):
+    global _CACHE
+    if _CACHE is None: _CACHE=WebCache(**kw)
+    return _CACHE
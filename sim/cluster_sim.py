@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# In-process cluster simulator for the gossip / memory-sync protocols.
+#
+# N logical nodes run the real DeltaGossip, EpidemicGossip, PeerTable,
+# SignedPacket/ReplayCache and (optionally) MemorySync code on a discrete-event
+# clock, talking through SimNetwork instead of HTTP/Kademlia. The network
+# injects latency, loss and churn. Reported: convergence time of a state change
+# (and of memory entries with --memsync), bytes and messages per round, CPU per
+# node and peers.json write I/O.
+#
+#   python -m sim.cluster_sim --nodes 100 --duration 600 --loss 0.05 --churn 0.01
+import os, sys, json, time, heapq, random, argparse, tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.p2p_layer import PeerTable
+from modules.gossip_delta import DeltaGossip
+from modules.epidemic import EpidemicGossip
+from modules.memory_store import MemoryStore
+from modules.memory_sync import MemorySync
+from guardian.guardian_sign import SignedPacket, ReplayCache
+
+class Unreachable(Exception): pass
+
+class SimClock:
+    def __init__(self):
+        self.now=0.0; self._q=[]; self._seq=0
+    def at(self, t, fn, *args):
+        self._seq+=1; heapq.heappush(self._q, (t, self._seq, fn, args))
+    def after(self, dt, fn, *args): self.at(self.now+dt, fn, *args)
+    def run(self, until, stop=None):
+        while self._q and self._q[0][0] <= until:
+            self.now, _, fn, args=heapq.heappop(self._q)
+            fn(*args)
+            if stop and stop(): return
+        self.now=max(self.now, until)  # idle until `until`; callers step the clock in slices
+
+class SimNetwork:
+    def __init__(self, clock, rng, latency=(0.01, 0.1), loss=0.0):
+        self.clock=clock; self.rng=rng; self.latency=latency; self.loss=loss
+        self.nodes={}; self.bytes=0; self.messages=0; self.dropped=0
+    def delay(self): return self.rng.uniform(*self.latency)
+    def deliver(self, src, dst, nbytes):
+        # Accounts one message; raises Unreachable when the target is down or the message is lost.
+        self.messages+=1; self.bytes+=nbytes
+        node=self.nodes.get(dst)
+        if node is None or not node.up or not self.nodes[src].up or self.rng.random() < self.loss:
+            self.dropped+=1; raise Unreachable(dst)
+        return node
+
+class SimNode:
+    def __init__(self, idx, sim, args):
+        self.idx=idx; self.sim=sim; self.id=f"n{idx:05d}"; self.host=self.id; self.port=idx+1
+        self.up=True; self.cpu=0.0; self.rounds=0; self.rep={}
+        self.peers=PeerTable(os.path.join(sim.tmp, f"peers_{self.id}.json"), flush_interval=0)
+        self.state={"rho":0.8,"chi":0.6,"psi":0.9,"node_id":self.id}
+        self.delta=DeltaGossip(self.id, self.state, self.peers, port=self.port, post=self._pull_post,
+                               on_state=self._on_state, submit=lambda fn, *a: sim.clock.after(sim.net.delay(), self._timed, fn, *a))
+        self.epi=EpidemicGossip(k=args.fanout, base_interval=args.interval, min_interval=args.interval/12,
+                                max_interval=args.interval*5, weight=lambda nid: self.rep.get(nid, 1.0), rng=sim.rng)
+        self.replay=ReplayCache()
+        self.store=self.sync=None
+        if args.memsync:
+            self.store=MemoryStore(":memory:", fts=False); self.sync=MemorySync(self.store)
+
+    def _timed(self, fn, *a):
+        t0=time.process_time()
+        try: return fn(*a)
+        finally: self.cpu+=time.process_time()-t0
+
+    def _on_state(self, changed):
+        if changed.get("rho")==self.sim.target: self.sim.mark_converged(self)
+
+    def _pull_post(self, url, req):
+        dst=url.split("//")[1].split(":")[0]
+        body=json.dumps(req)
+        try:
+            node=self.sim.net.deliver(self.host, dst, len(body))
+            out=json.dumps(node._timed(node.delta.pull_response, json.loads(body)))
+            self.sim.net.deliver(dst, self.host, len(out))
+        except Unreachable:
+            return None  # same as a failed/unverified HTTP pull
+        return json.loads(out)
+
+    # --- one gossip round, mirroring Node.gossip_round in mhk_agi_v2 ---
+    def gossip_round(self):
+        if self.up:
+            self._timed(self._send_round); self.rounds+=1; self.sim.rounds+=1
+        self.sim.clock.after(self.epi.next_sleep(), self.gossip_round)
+
+    def _send_round(self):
+        news0=self.delta.stats["news"]
+        targets=self.epi.select(self.peers.active())
+        # seq keeps packets unique: sim rounds are real-time microseconds apart, so an
+        # unchanged digest would otherwise repeat (ts, sig) and hit the replay cache.
+        pkt=SignedPacket({**self.delta.packet(), "seq": self.rounds})
+        for p in targets:
+            self.sim.clock.after(self.sim.net.delay(), self._deliver_gossip, p["node_id"], pkt.body)
+        self.sim.clock.after(self.sim.args.peer_timeout, self._end_round, news0, len(targets))
+
+    def _end_round(self, news0, contacted):
+        self.epi.observe(self.delta.stats["news"]-news0, contacted)
+
+    def _deliver_gossip(self, dst, body):
+        try: node=self.sim.net.deliver(self.host, dst, len(body))
+        except Unreachable: return self._result(dst, None)
+        reply=node._timed(node.receive, body, self.host)
+        self.sim.clock.after(self.sim.net.delay(), self._deliver_reply, dst, reply)
+
+    def _deliver_reply(self, src, reply):
+        try: self.sim.net.deliver(src, self.host, len(reply))
+        except Unreachable: return self._result(src, None)
+        self._timed(self._result, src, json.loads(reply))
+
+    def _result(self, nid, reply):
+        ok=reply is not None
+        self.peers.update(nid, "active" if ok else "inactive")
+        self.rep[nid]=max(0.0, min(1.0, self.rep.get(nid, 1.0)+(0.01 if ok else -0.05)))
+        if ok and reply.get("digest") and self.replay.check(reply)==ReplayCache.NEW:
+            self.delta.on_gossip(reply, self.sim.nodes[nid].host)
+
+    def receive(self, body, remote_host):
+        # Equivalent of the /gossip handler.
+        data=json.loads(body)
+        seen=self.replay.check(data)
+        if seen!=ReplayCache.NEW: return json.dumps({"status":"ok","duplicate":True})
+        pull=self.delta.on_gossip(data, remote_host)
+        return SignedPacket({"status":"ok","pull":pull,**self.delta.packet()}).body
+
+    # --- memory anti-entropy ---
+    def memsync_round(self):
+        if self.up:
+            peers=[p for p in self.peers.active()]
+            if peers:
+                dst=self.sim.rng.choice(peers)["node_id"]
+                def send(msg):
+                    body=json.dumps(msg); node=self.sim.net.deliver(self.host, dst, len(body))
+                    out=json.dumps(node._timed(node.sync.handle, json.loads(body)))
+                    self.sim.net.deliver(dst, self.host, len(out)); return json.loads(out)
+                try: self._timed(self.sync.reconcile, send)
+                except Unreachable: pass
+        self.sim.clock.after(self.sim.args.memsync_interval*(0.9+0.2*self.sim.rng.random()), self.memsync_round)
+
+    def flush_peers(self):
+        if self.peers._dirty:
+            self.sim.peer_writes+=1
+            if self.sim.args.peer_io:
+                self.peers.flush(); self.sim.peer_bytes+=os.path.getsize(self.peers.path)
+            else:
+                self.sim.peer_bytes+=len(json.dumps(self.peers.snapshot(), separators=(",",":"))); self.peers._dirty=False
+        self.sim.clock.after(self.sim.args.peer_flush, self.flush_peers)
+
+class Simulation:
+    def __init__(self, args):
+        self.args=args; self.rng=random.Random(args.seed); self.clock=SimClock()
+        self.tmp=tempfile.mkdtemp(prefix="echo_sim_")
+        self.net=SimNetwork(self.clock, self.rng, (args.lat_min, args.lat_max), args.loss)
+        self.nodes={}; self.rounds=0; self.peer_writes=0; self.peer_bytes=0
+        self.target=None; self.converged=set(); self.converged_at=None
+        for i in range(args.nodes):
+            n=SimNode(i, self, args); self.nodes[n.id]=n; self.net.nodes[n.id]=n
+        ids=list(self.nodes)
+        for n in self.nodes.values():  # bootstrap: each node knows a few random peers
+            for nid in self.rng.sample([x for x in ids if x!=n.id], min(args.seed_peers, len(ids)-1)):
+                m=self.nodes[nid]; n.peers.update(m.id, "active", m.host, m.port)
+
+    def mark_converged(self, node):
+        self.converged.add(node.id)
+        if self.converged_at is None and len(self.converged)==len(self.nodes):
+            self.converged_at=self.clock.now-self.t_inject
+
+    def churn(self):
+        for n in self.nodes.values():
+            if n.idx and self.rng.random() < self.args.churn:  # node 0 (the origin) stays up
+                n.up=False; self.clock.after(self.args.downtime, setattr, n, "up", True)
+        self.clock.after(1.0, self.churn)
+
+    def mem_converged(self):
+        counts=[n.store.connection().execute("SELECT COUNT(*) FROM mem_entries").fetchone()[0] for n in self.nodes.values()]
+        return min(counts)==self.mem_total
+
+    def run(self):
+        a=self.args; wall0=time.perf_counter()
+        for n in self.nodes.values():
+            self.clock.at(self.rng.uniform(0, a.interval), n.gossip_round)
+            self.clock.at(self.rng.uniform(0, a.peer_flush), n.flush_peers)
+            if a.memsync: self.clock.at(self.rng.uniform(0, a.memsync_interval), n.memsync_round)
+        if a.churn: self.clock.at(1.0, self.churn)
+        self.clock.run(a.warmup)
+        origin=self.nodes["n00000"]; self.target=0.123; self.t_inject=self.clock.now
+        origin.delta.set_local("rho", self.target); self.mark_converged(origin)
+        self.mem_total=0; mem_conv=None
+        if a.memsync:
+            for i in range(a.mem_entries): self.rng.choice(list(self.nodes.values())).store.put_event("event", {"i": i})
+            self.mem_total=a.mem_entries
+        b0, m0, r0=self.net.bytes, self.net.messages, self.rounds
+        end=self.clock.now+a.duration; step=max(1.0, a.interval/4)
+        while self.clock.now < end:
+            self.clock.run(min(end, self.clock.now+step))
+            if a.memsync and mem_conv is None and self.mem_converged(): mem_conv=self.clock.now-self.t_inject
+            if self.converged_at is not None and (not a.memsync or mem_conv is not None) and not a.full: break
+            if not self.clock._q: break
+        rounds=max(1, self.rounds-r0)
+        cpu=[n.cpu for n in self.nodes.values()]
+        return {
+            "nodes": a.nodes, "fanout": a.fanout, "loss": a.loss, "churn": a.churn,
+            "sim_seconds": round(self.clock.now-self.t_inject, 3),
+            "state_converged_s": None if self.converged_at is None else round(self.converged_at, 3),
+            "state_converged_frac": round(len(self.converged)/len(self.nodes), 4),
+            "mem_converged_s": None if mem_conv is None else round(mem_conv, 3),
+            "rounds": rounds, "rounds_per_node": round(rounds/a.nodes, 2),
+            "bytes": self.net.bytes-b0, "bytes_per_round": round((self.net.bytes-b0)/rounds, 1),
+            "messages_per_round": round((self.net.messages-m0)/rounds, 2), "dropped": self.net.dropped,
+            "cpu_per_node_ms": round(1000*sum(cpu)/len(cpu), 3), "cpu_max_node_ms": round(1000*max(cpu), 3),
+            "peer_file_writes": self.peer_writes, "peer_file_bytes": self.peer_bytes,
+            "wall_seconds": round(time.perf_counter()-wall0, 3),
+        }
+
+def parse_args(argv=None):
+    ap=argparse.ArgumentParser(description="EchoCore in-process gossip/sync cluster simulator")
+    ap.add_argument("--nodes", type=int, default=100)
+    ap.add_argument("--fanout", type=int, default=3)
+    ap.add_argument("--interval", type=float, default=60.0, help="base GOSSIP_INTERVAL (sim seconds)")
+    ap.add_argument("--duration", type=float, default=1800.0, help="sim seconds to run after the change is injected")
+    ap.add_argument("--warmup", type=float, default=120.0)
+    ap.add_argument("--seed-peers", type=int, default=3)
+    ap.add_argument("--lat-min", type=float, default=0.01)
+    ap.add_argument("--lat-max", type=float, default=0.15)
+    ap.add_argument("--loss", type=float, default=0.0)
+    ap.add_argument("--churn", type=float, default=0.0, help="per-node probability of going down each sim second")
+    ap.add_argument("--downtime", type=float, default=60.0)
+    ap.add_argument("--peer-timeout", type=float, default=3.0)
+    ap.add_argument("--peer-flush", type=float, default=5.0, help="PeerTable write-behind interval")
+    ap.add_argument("--no-peer-io", dest="peer_io", action="store_false", help="count flushes without touching disk")
+    ap.add_argument("--memsync", action="store_true", help="also run MemorySync reconciliation")
+    ap.add_argument("--mem-entries", type=int, default=200)
+    ap.add_argument("--memsync-interval", type=float, default=120.0)
+    ap.add_argument("--full", action="store_true", help="run the whole duration even after convergence")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", action="store_true")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    report=Simulation(args).run()
+    if args.json: print(json.dumps(report))
+    else:
+        for k, v in report.items(): print(f"{k:>24}: {v}")
+    return report
+
+if __name__ == "__main__":
+    main()
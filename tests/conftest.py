@@ -0,0 +1,32 @@
+import os, sys, json, time, hashlib
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def entry():
+    # MemoryStore entry with a matching hash; str ids are used as-is, ints become hex ids spread over the prefix space
+    def make(i, ts="2099-01-01T00:00:00", payload=None):
+        payload = {"i": i} if payload is None else payload
+        id_ = i if isinstance(i, str) else hashlib.sha256(str(i).encode()).hexdigest()[:16]
+        return {"id": id_, "ts": ts, "type": "event", "payload": payload, "sig": "s",
+                "hash": hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()}
+    return make
+
+class _Peers:
+    # PeerTable stand-in for gossip tests: no members, never changes
+    version = 0
+    def update(self, *a): pass
+    def changed_since(self, v, limit=None): return [], 0
+
+@pytest.fixture
+def peers():
+    return _Peers()
+
+@pytest.fixture
+def until():
+    # polls pred until it holds or timeout passes; returns its last value
+    def wait(pred, timeout=2.0):
+        end = time.time() + timeout
+        while time.time() < end and not pred(): time.sleep(0.005)
+        return pred()
+    return wait
@@ -0,0 +1,33 @@
+import pytest
+pytest.importorskip("flask")
+from mhk_agi_v2 import create_app
+
+def test_subsystems_are_built_on_first_use(tmp_path):
+    app = create_app({"MEM_DB_PATH": str(tmp_path / "m.db"), "FEATURE_P2P": False}, socketio=False)
+    node = app.extensions["echo"]
+    assert node._built == {} and not node.started
+    assert app.test_client().get("/mhksi").get_json()["mode"] == "steady"
+    assert set(node._built) == {"mhksi"} and set(node.timings["mhksi"]) == {"import_ms", "init_ms"}
+    assert node.mhksi is node._built["mhksi"]
+
+def _conf(tmp_path, name, **kw):
+    d = tmp_path / name; d.mkdir()
+    return {"MEM_DB_PATH": str(d / "m.db"), "WEB_CACHE_PATH": str(d / "web.db"), "TRANSLATE_CACHE_PATH": str(d / "tr.db"),
+            "SKILLS_PATH": str(d / "skills.jsonl"), "PEERS_PATH": str(d / "peers.json"), **kw}
+
+def test_two_apps_do_not_share_nodes(tmp_path):
+    a = create_app(_conf(tmp_path, "a", SCHED_WORKERS=2), socketio=False)
+    b = create_app(_conf(tmp_path, "b", LANG="pl", SCHED_WORKERS=3, MATH_TIMEOUT_S=0.5), socketio=False)
+    na, nb = a.extensions["echo"], b.extensions["echo"]
+    assert na is not nb and na.node_id != nb.node_id and nb.lang == "pl"
+    try:
+        for name in ("scheduler", "skills", "peers", "math", "web", "translator"):
+            assert getattr(na, name) is not getattr(nb, name), name
+        assert (na.scheduler.workers, nb.scheduler.workers) == (2, 3) and nb.math.timeout == 0.5
+        assert nb.web.path == str(tmp_path / "b" / "web.db") and nb.peers.path == str(tmp_path / "b" / "peers.json")
+        nb.skills.add("x", "only b", 1); nb.translator.translate_many(["hello"], "pl")
+        assert na.skills.best("x") is None and (tmp_path / "b" / "skills.jsonl").exists() and (tmp_path / "b" / "tr.db").exists()
+        ja, jb = na.scheduler.once("Broadcast", lambda: None, 60), nb.scheduler.once("Broadcast", lambda: None, 60)
+        assert na.scheduler.jobs["Broadcast"] is ja and nb.scheduler.jobs["Broadcast"] is jb  # same job name, no clobbering
+    finally:
+        for n in (na, nb): n.scheduler.shutdown()
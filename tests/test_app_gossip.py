@@ -0,0 +1,13 @@
+import pytest
+pytest.importorskip("flask")
+from guardian.guardian_sign import SignedPacket, verify_packet
+from modules.gossip_delta import DeltaGossip
+from mhk_agi_v2 import create_app
+
+def test_push_pull_reply_is_signed(peers):
+    app = create_app(socketio=False)
+    peer = DeltaGossip("peer", {"rho": 0.5, "node_id": "peer"}, peers)
+    r = app.test_client().post("/gossip", data=SignedPacket(peer.packet()).body, content_type="application/json")
+    reply = r.get_json()
+    assert r.status_code == 200 and reply["digest"] and verify_packet(reply)
+    assert not verify_packet({**reply, "node": "forged"})
@@ -0,0 +1,29 @@
+import types
+import pytest
+pytest.importorskip("flask")
+from mhk_agi_v2 import create_app
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # default cache files
+    app = create_app({"OFFLINE_MODE": True, "FEATURE_P2P": False, "MEM_DB_PATH": str(tmp_path / "m.db")}, socketio=False)
+    yield app
+    app.extensions["echo"].ask.close()
+
+@pytest.mark.parametrize("budget", ["abc", [1], "nan", True, "inf"])
+def test_invalid_budget_is_rejected(app, budget):
+    r = app.test_client().post("/ask", json={"text": "2+2?", "budget_ms": budget})
+    assert r.status_code == 400
+
+@pytest.mark.parametrize("budget", [-5, 0, "250", 10**9])
+def test_budget_is_clamped(app, budget):
+    r = app.test_client().post("/ask", json={"text": "2+2?", "budget_ms": budget})
+    assert r.status_code == 200 and r.get_json()["narration"]
+
+def test_stage_errors_are_not_reported_as_skipped(app):
+    node = app.extensions["echo"]
+    def boom(text): raise RuntimeError("broken")
+    node._built["math"] = types.SimpleNamespace(evaluate=boom)
+    entry = app.test_client().post("/ask", json={"text": "2+2?"}).get_json()
+    assert entry["errors"] == ["math"] and "math" not in entry["skipped"] and entry["partial"]
+    assert node.ask.stats["errors"] == {"math": 1}
@@ -0,0 +1,35 @@
+import pytest
+from modules.broadcaster import Broadcaster, LEGACY_ROOM
+
+class _Sched:
+    def once(self, *a): pass
+
+def test_coalesced_deltas_and_legacy_full_payload():
+    sent = []
+    b = Broadcaster(lambda ev, msg, to: sent.append((ev, msg, to)), scheduler=_Sched())
+    b.publish("state_update", {"coh": 1, "x": 0}); b.publish("state_update", {"coh": 2})
+    b.flush()
+    assert sent == [("state_update", {"seq": 1, "delta": {"coh": 2, "x": 0}}, "ch:state_update"),
+                    ("state_update", {"coh": 2, "x": 0}, LEGACY_ROOM)]
+    sent.clear(); b.publish("state_update", {"coh": 2, "x": 1}); b.flush()
+    assert sent[0][1] == {"seq": 2, "delta": {"x": 1}} and sent[1][1] == {"coh": 2, "x": 1}
+    assert b.snapshot("state_update") == {"seq": 2, "full": {"coh": 2, "x": 1}}
+
+def test_unchanged_values_send_nothing():
+    sent = []
+    b = Broadcaster(lambda *a, **k: sent.append(a), scheduler=_Sched(), legacy=False)
+    b.publish("c", {"k": 1}); b.flush(); b.publish("c", {"k": 1}); b.flush()
+    assert len(sent) == 1
+
+def test_socketio_clients(tmp_path, monkeypatch):
+    pytest.importorskip("flask_socketio")
+    from mhk_agi_v2 import create_app
+    monkeypatch.chdir(tmp_path)
+    app = create_app({"MEM_DB_PATH": str(tmp_path / "m.db")})
+    node = app.extensions["echo"]; sio = node.socketio
+    legacy, sub = sio.test_client(app), sio.test_client(app)
+    sub.emit("subscribe", {"channels": ["state_update"]}); sub.get_received()
+    node.broadcaster.scheduler = _Sched()  # flush here, not on the scheduler thread
+    node.emit("state_update", {"coh": 0.5}); node.broadcaster.flush()
+    assert [m["args"][0] for m in legacy.get_received()] == [{"coh": 0.5}]
+    assert [m["args"][0] for m in sub.get_received()] == [{"seq": 1, "delta": {"coh": 0.5}}]
@@ -0,0 +1,13 @@
+from sim.cluster_sim import Simulation, parse_args
+
+def _run(*argv):
+    return Simulation(parse_args(["--no-peer-io", *argv])).run()
+
+def test_state_change_reaches_every_node():
+    r = _run("--nodes", "12", "--duration", "600")
+    assert r["state_converged_frac"] == 1.0 and r["state_converged_s"] is not None
+
+def test_memsync_converges_when_gossip_backs_off():
+    # epidemic sleeps grow past the driver's step; the clock must still move forward
+    r = _run("--nodes", "6", "--memsync", "--mem-entries", "60", "--duration", "900")
+    assert r["mem_converged_s"] is not None and r["sim_seconds"] <= 900
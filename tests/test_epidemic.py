@@ -0,0 +1,16 @@
+import random
+from modules.epidemic import EpidemicGossip
+
+def test_select_k_distinct_peers_weighted():
+    peers = [{"node_id": f"n{i}"} for i in range(10)]
+    e = EpidemicGossip(k=3, weight=lambda nid: 100.0 if nid == "n7" else 0.01, rng=random.Random(1))
+    picks = [e.select(peers) for _ in range(50)]
+    assert all(len({p["node_id"] for p in s}) == 3 for s in picks)
+    assert sum(any(p["node_id"] == "n7" for p in s) for s in picks) >= 45
+    assert e.select(peers[:2]) == peers[:2]
+
+def test_interval_speeds_up_on_news_and_backs_off_when_quiet():
+    e = EpidemicGossip(base_interval=60, min_interval=5, max_interval=300)
+    assert e.observe(news=2, contacted=3) == 30 and e.observe(1, 3) == 15
+    for _ in range(20): e.observe(0, 3)
+    assert e.interval == 300 and 270 <= e.next_sleep() <= 330
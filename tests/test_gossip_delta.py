@@ -0,0 +1,26 @@
+import time
+from modules.gossip_delta import DeltaGossip
+from modules.state_store import StateStore
+
+def test_proto1_fields_are_opt_in(peers):
+    p = DeltaGossip("a", {"rho": 0.8, "node_id": "a"}, peers).packet()
+    assert p["proto"] == 2 and p["digest"] and "state" not in p and "signature" not in p
+    p = DeltaGossip("a", {"rho": 0.8, "node_id": "a"}, peers, compat=True).packet()
+    assert p["state"]["rho"] == 0.8 and "signature" in p
+
+def test_direct_state_writes_are_advertised(peers, until):
+    sa, sb = StateStore({"rho": 0.8, "node_id": "a"}), StateStore({"rho": 0.8, "node_id": "b"})
+    a, b = DeltaGossip("a", sa, peers), DeltaGossip("b", sb, peers)
+    v0 = a.state_v
+    sa.update(rho=0.3)                       # e.g. a plugin writing node.state directly
+    assert until(lambda: a.state_v > v0)
+    b.merge("a", a.pull_response({"want": ["state"]}))
+    assert sb["rho"] == 0.3 and sb["node_id"] == "b"
+
+def test_merged_values_are_not_re_advertised_as_local(peers):
+    sa, sb = StateStore({"rho": 0.8, "node_id": "a"}), StateStore({"rho": 0.8, "node_id": "b"})
+    a, b = DeltaGossip("a", sa, peers), DeltaGossip("b", sb, peers)
+    a.set_local("rho", 0.1)
+    b.merge("a", a.pull_response({"want": ["state"]}))
+    time.sleep(0.1)
+    assert b.stats["local"] == 0 and b.state_meta["rho"] == [1, "a"]
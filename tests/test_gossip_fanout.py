@@ -0,0 +1,21 @@
+import time
+import pytest
+pytest.importorskip("requests")
+from modules.gossip_fanout import GossipFanout
+
+def test_peers_not_attempted_by_deadline_are_skipped():
+    fan = GossipFanout(max_workers=2, peer_timeout=1.0, round_deadline=0.3)
+    fan._post = lambda peer, body, headers: (time.sleep(0.5), (False, 0.5, None))[1]
+    peers = [{"node_id": f"n{i}", "host": "h", "port": 1} for i in range(6)]
+    out = fan.send(peers, {"x": 1})
+    assert len(out) == 6
+    assert all(r["skipped"] and not r["ok"] for r in out.values())
+    assert fan.stats["skipped"] == 4 and fan.stats["timed_out"] == 2 and fan.stats["failed"] == 0
+    fan.close()
+
+def test_completed_failures_are_not_skipped():
+    fan = GossipFanout(max_workers=4, round_deadline=2.0)
+    fan._post = lambda peer, body, headers: (peer["node_id"] == "ok", 0.01, None)
+    out = fan.send([{"node_id": "ok", "host": "h", "port": 1}, {"node_id": "bad", "host": "h", "port": 1}], b"{}")
+    assert out["ok"]["ok"] and not out["bad"]["ok"] and not out["bad"]["skipped"]
+    fan.close()
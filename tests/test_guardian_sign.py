@@ -0,0 +1,13 @@
+from guardian.guardian_sign import sign_packet, SignedPacket, ReplayCache
+
+def test_forged_body_does_not_poison_genuine_packet():
+    data = {"node_id": "a", "rho": 0.8}
+    pkt = {**data, **sign_packet(data)}
+    rc = ReplayCache()
+    assert rc.check({**pkt, "rho": 0.1}) == ReplayCache.BAD   # seen first, same (ts, sig)
+    assert rc.check(pkt) == ReplayCache.NEW
+    assert rc.check(dict(pkt)) == ReplayCache.DUP
+
+def test_signed_packet_matches_sign_packet():
+    sp = SignedPacket({"x": 1})
+    assert ReplayCache().check(sp.as_dict()) == ReplayCache.NEW
@@ -0,0 +1,41 @@
+import time
+import pytest
+from modules.math_eval import MathEvaluator, fast_eval, _Unsupported
+
+def test_fast_path():
+    m = MathEvaluator(fallback=False)
+    assert m.evaluate("2 ^ 10 = ?") == "1024" and m.evaluate("sqrt(16)?") == "4"
+    assert m.evaluate("what is love?") is None
+
+@pytest.mark.parametrize("expr", ["(-8)**0.5", "(-1)**(1/3)"])
+def test_complex_results_are_left_to_sympy(expr):
+    with pytest.raises(_Unsupported): fast_eval(expr)
+    assert MathEvaluator(fallback=False).evaluate(expr + "?") is None
+
+def test_cold_worker_does_not_block_the_request():
+    m = MathEvaluator(timeout=2.0)
+    try:
+        t0 = time.monotonic()
+        assert m.evaluate("x + 1?") is None
+        assert time.monotonic() - t0 < 0.5
+        assert "x + 1" not in m._cache  # retried once the worker is up
+    finally:
+        m.close()
+
+def test_warm_worker_answers_complex():
+    pytest.importorskip("sympy")
+    m = MathEvaluator(timeout=5.0)
+    try:
+        m.warm()
+        assert m._all[0].ready.wait(30)
+        assert m.evaluate("(-8)^0.5?").endswith("*I")
+    finally:
+        m.close()
+
+@pytest.mark.parametrize("expr", ["__import__('os').getpid() + 1", "(1).__class__", "2 + x.real", "[1, 2][0]", "f(2)", "sqrt(x=4)", "_x + 1"])
+def test_only_plain_arithmetic_reaches_the_worker(expr, monkeypatch):
+    m = MathEvaluator(); sent = []
+    monkeypatch.setattr(m, "_sympy", sent.append)
+    assert m.evaluate(expr + "?") is None and sent == []
+    m.evaluate("sqrt(x) + 1?")
+    assert sent == ["sqrt(x) + 1"]
@@ -0,0 +1,20 @@
+from datetime import datetime
+from modules.memory_store import MemoryStore
+from modules.memory_compactor import MemoryCompactor
+from modules.memory_sync import MemorySync
+
+def test_fresh_db_uses_incremental_auto_vacuum(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"))
+    assert m.connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+def test_archived_history_reachable_from_sync(tmp_path, entry):
+    m = MemoryStore(str(tmp_path / "m.db"), fts=False)
+    for i in range(5): m.put(entry(f"id{i:04d}", f"2026-01-0{i+1}T00:00:00"))
+    comp = MemoryCompactor(m, retention_days=30, archive_dir=str(tmp_path / "arch"), vacuum_hours=0)
+    comp.run_once(now=datetime(2026, 2, 3))   # cutoff 2026-01-04: ids 0..2 move to the archive
+    assert [e["id"] for e in m.pull_since("")] == ["id0003", "id0004"]
+    sync = MemorySync(m, archive=comp)
+    assert [e["id"] for e in sync.export_diff("")] == [f"id{i:04d}" for i in range(5)]
+    assert [e["id"] for e in sync.export_diff("2026-01-02T00:00:00")] == ["id0002", "id0003", "id0004"]
+    raw = list(sync.iter_diff(""))
+    assert all("payload_json" in e for e in raw) and len(raw) == 5
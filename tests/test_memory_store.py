@@ -0,0 +1,55 @@
+import threading, time
+import modules.memory_store as ms
+from modules.memory_store import MemoryStore
+
+def test_batched_writes_visible_after_flush(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"), batched=True)
+    for i in range(50): m.put_event("event", {"i": i})
+    m.flush()
+    assert len(m.pull_since("")) == 50
+    m.close()
+
+def test_put_and_flush_after_close_do_not_hang(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"), batched=True)
+    m.put_event("event", {"i": 0}); m.close()
+    t = threading.Thread(target=lambda: (m.put_event("event", {"i": 1}), m.flush()), daemon=True)
+    t.start(); t.join(5)
+    assert not t.is_alive()
+    assert len(m.pull_since("")) == 2
+
+def test_flush_racing_close_returns(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"), batched=True)
+    q = m._q; put = q.put
+    def slow_put(item, *a, **kw):
+        if item is ms._FLUSH: time.sleep(0.2)  # close() runs while flush() is between its check and its put
+        put(item, *a, **kw)
+    q.put = slow_put
+    t = threading.Thread(target=m.flush, daemon=True); t.start()
+    time.sleep(0.05); m.close(); t.join(5)
+    assert not t.is_alive() and m._closed
+    m.flush()
+
+def test_close_with_queued_rows_keeps_them(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"), batched=True, flush_interval=0.5)
+    for i in range(200): m.put_event("event", {"i": i})
+    writer = m._writer; m.close()
+    assert not writer.is_alive() and len(m.pull_since("")) == 200
+
+def test_zero_flush_interval_still_commits(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"), batched=True, flush_interval=0)
+    for i in range(10): m.put_event("event", {"i": i})
+    m.flush()
+    assert len(m.pull_since("")) == 10
+    m.close()
+
+def test_pull_since_excludes_boundary_ts(tmp_path, entry):
+    m = MemoryStore(str(tmp_path / "m.db"))
+    m.put(entry("a", "2026-01-01T00:00:00")); m.put(entry("b", "2026-01-01T00:00:01"))
+    assert [e["id"] for e in m.pull_since("2026-01-01T00:00:00")] == ["b"]
+    assert [e["id"] for e in m.pull_since("")] == ["a", "b"]
+
+def test_keyset_pages_do_not_skip_shared_ts(tmp_path, entry):
+    m = MemoryStore(str(tmp_path / "m.db"))
+    for i in range(7): m.put(entry(f"id{i}", "2026-01-01T00:00:00"))
+    assert [e["id"] for e in m.iter_since("", page_size=3)] == [f"id{i}" for i in range(7)]
+    assert [e["id"] for e in m.pull_since("2026-01-01T00:00:00", since_id="id3")] == ["id4", "id5", "id6"]
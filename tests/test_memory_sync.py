@@ -0,0 +1,33 @@
+import random
+from modules.memory_store import MemoryStore
+from modules.memory_sync import MemorySync, RangeHashIndex
+
+def _full(store, prefixes):
+    return RangeHashIndex(type("Plain", (), {"iter_id_hash": store.iter_id_hash})()).summary(prefixes)
+
+def test_incremental_index_matches_rebuild(tmp_path, entry):
+    m = MemoryStore(str(tmp_path / "m.db"), fts=False)
+    idx = RangeHashIndex(m)
+    for i in range(300): m.put(entry(i))
+    idx.summary([""])
+    rnd = random.Random(1)
+    for i in rnd.sample(range(300), 40): m.put(entry(i, payload={"i": i, "v": 2}))   # replace
+    for i in range(300, 340): m.put(entry(i))
+    m.delete_before("2099-01-01T00:00:01", limit=25)
+    prefixes = ["", "0", "a", "f3"]
+    assert idx.summary(prefixes) == _full(m, prefixes)
+
+def test_summary_does_not_flush_writer(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"), batched=True, fts=False)
+    m.flush = lambda: (_ for _ in ()).throw(AssertionError("flush from a summary"))
+    sync = MemorySync(m)
+    assert sync.handle({"op": "summary", "prefixes": [""]})["summary"][""]["self"][0] == 0
+
+def test_reconcile_converges(tmp_path, entry):
+    a = MemoryStore(str(tmp_path / "a.db"), fts=False); b = MemoryStore(str(tmp_path / "b.db"), fts=False)
+    for i in range(100): a.put(entry(i))
+    for i in range(50, 180): b.put(entry(i))
+    sa, sb = MemorySync(a), MemorySync(b)
+    res = sa.reconcile(sb.handle)
+    assert res == {"pulled": 80, "pushed": 50}
+    assert sa.handle({"op": "summary"})["summary"] == sb.handle({"op": "summary"})["summary"]
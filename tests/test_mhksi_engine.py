@@ -0,0 +1,52 @@
+import pytest
+import modules.mhksi_engine as me
+
+ROWS = ([0.8, 0.1, 0.5, 0.9], [0.6, 0.2, 0.9, 0.1], [0.9, 0.3, 0.4, 1.0], [0.0, 0.5, -0.5, 1.0], [0.5, 0.2, 0.9, 1.0])
+
+def _scalar(cfg):
+    e = me.MHKSIEngine(cfg); out = []
+    for row in zip(*ROWS): out.append(e.update(*row))
+    return out
+
+@pytest.mark.parametrize("numpy", [False, True])
+def test_batch_matches_scalar_engine(monkeypatch, numpy):
+    if numpy: pytest.importorskip("numpy")
+    monkeypatch.setattr(me, "NUMPY_AVAILABLE", numpy)
+    cfg = me.MHKSIConfig(ema_alpha=0.5, on_threshold=0.7)
+    e = me.MHKSIEngine(cfg); ref = _scalar(cfg)
+    assert list(e.compute_batch(*ROWS)) == pytest.approx([r["instant"] for r in ref])
+    r = e.run_batch(*ROWS)
+    assert list(r["M"]) == pytest.approx([x["M"] for x in ref])
+    assert [me.MODES[int(c)] for c in r["mode"]] == [x["mode"] for x in ref]
+    assert e.M == 0.5  # run_batch leaves the live engine alone
+
+def test_refresh_records_sampled_events(tmp_path):
+    pytest.importorskip("flask")
+    from mhk_agi_v2 import create_app
+    node = create_app({"MEM_DB_PATH": str(tmp_path / "m.db"), "MEM_BATCH_WRITES": False,
+                       "MHKSI_EVENT_INTERVAL_S": 60}, socketio=False).extensions["echo"]
+    for rho in (0.1, 0.2, 0.3, 0.4):
+        node.refresh_mhksi(snap={"rho": rho, "chi": 0.6, "psi": 0.9})
+    assert len(list(node.mem.iter_since("", etype="mhksi"))) == 1
+    node.mem.close()
+
+def test_history_rings_are_bounded_and_aggregate():
+    h = me.MHKSIHistory(raw=10, minutes=5, hours=2)
+    for i in range(300): h.add(1000.0 + i, 0.5, i / 300, "steady")
+    raw = h.query(0, 2000, res="raw")
+    assert raw["t"] == [1290.0 + i for i in range(10)]
+    minute = h.query(0, 2000, res="minute")
+    assert len(minute["t"]) == 5 and all(n == 60 for n in minute["n"][1:-1])
+    assert minute["M_min"][-1] <= minute["M"][-1] <= minute["M_max"][-1]
+    assert h.query(1295, 1297, res="raw")["t"] == [1295.0, 1296.0, 1297.0]
+    with pytest.raises(ValueError): h.query(res="day")
+
+def test_history_route(tmp_path):
+    pytest.importorskip("flask")
+    from mhk_agi_v2 import create_app
+    app = create_app({"MEM_DB_PATH": str(tmp_path / "m.db")}, socketio=False)
+    app.extensions["echo"].mhksi.update(0.8, 0.6, 0.9, 0.0, 0.5)
+    c = app.test_client()
+    r = c.get("/mhksi/history").get_json()
+    assert r["res"] == "raw" and len(r["M"]) == 1
+    assert c.get("/mhksi/history?res=week").status_code == 400
@@ -0,0 +1,52 @@
+import asyncio, threading
+import pytest
+import modules.p2p_message_router as pmr
+
+class _Server:
+    def __init__(self):
+        self.sets = []; self.gets = 0; self.data = {}; self.gate = asyncio.Event()
+        self.gate.set()
+    async def set(self, k, v):
+        await self.gate.wait(); self.sets.append((k, v)); self.data[k] = v; return True
+    async def get(self, k):
+        self.gets += 1; await asyncio.sleep(0.05); return self.data.get(k)
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(pmr, "KADEMLIA_AVAILABLE", True)
+    loop = asyncio.new_event_loop()
+    t = threading.Thread(target=loop.run_forever, daemon=True); t.start()
+    layer = type("L", (), {"loop": loop, "server": _Server()})()
+    yield pmr.P2PMessageRouter(layer, max_inflight=1, max_pending=2)
+    loop.call_soon_threadsafe(loop.stop); t.join(1)
+
+def _drain(r):  # let the loop run the queued call_soon_threadsafe callbacks
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), r.p2p_layer.loop).result()
+
+def test_writes_to_a_busy_topic_coalesce(router):
+    srv = router.p2p_layer.server; router.p2p_layer.loop.call_soon_threadsafe(srv.gate.clear)
+    first = router.send_message("t", "v1")
+    later = [router.send_message("t", f"v{i}") for i in (2, 3)]
+    _drain(router)
+    router.p2p_layer.loop.call_soon_threadsafe(srv.gate.set)
+    assert first.result(2) and all(f.result(2) for f in later)
+    assert srv.sets == [("t", b"v1"), ("t", b"v3")] and router.stats["coalesced"] == 1
+
+def test_new_topics_are_refused_when_the_queue_is_full(router):
+    srv = router.p2p_layer.server; router.p2p_layer.loop.call_soon_threadsafe(srv.gate.clear)
+    futs = [router.send_message(f"t{i}", "x") for i in range(4)]  # 1 in flight, 2 pending, 1 refused
+    _drain(router)
+    with pytest.raises(RuntimeError): futs[3].result(2)
+    router.p2p_layer.loop.call_soon_threadsafe(srv.gate.set)
+    assert all(f.result(2) for f in futs[:3])
+
+def test_reads_are_cached_and_single_flight(router):
+    srv = router.p2p_layer.server
+    assert router.send_message("k", {"a": 1}).result(2)
+    got = []
+    ts = [threading.Thread(target=lambda: got.append(router.get("k"))) for _ in range(5)]
+    for t in ts: t.start()
+    for t in ts: t.join(2)
+    assert got == [{"a": 1}] * 5 and router.get("k") == {"a": 1}
+    assert srv.gets == 1 and router.stats["read_hits"] >= 1
+    assert router.get("missing") is None and router.get("missing") is None and srv.gets == 2
@@ -0,0 +1,17 @@
+import json, pytest
+from modules.p2p_layer import PeerTable
+
+def test_failed_flush_keeps_table_dirty(tmp_path, monkeypatch):
+    t = PeerTable(str(tmp_path / "peers.json"), flush_interval=0)
+    t.update("n1", "active", "10.0.0.1", 5000)
+    monkeypatch.setattr("modules.p2p_layer.os.replace", lambda *a: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(OSError): t.flush()
+    monkeypatch.undo()
+    t.flush()
+    assert [p["node_id"] for p in json.load(open(tmp_path / "peers.json"))] == ["n1"]
+
+def test_snapshot_returns_copies(tmp_path):
+    t = PeerTable(str(tmp_path / "peers.json"), flush_interval=0)
+    t.update("n1", "active", "10.0.0.1", 5000)
+    t.snapshot()[0]["host"] = "evil"
+    assert t.snapshot()[0]["host"] == "10.0.0.1"
@@ -0,0 +1,16 @@
+import json
+from bench import run_bench as rb
+
+def test_compare_flags_regressions_only_past_threshold():
+    base = {"results": {"a": {"us_per_op": 10.0}, "b": {"us_per_op": 10.0}}}
+    res = {"a": {"us_per_op": 12.0}, "b": {"us_per_op": 14.0}, "c": {"us_per_op": 1.0}, "d": {"skipped": "no numpy"}}
+    rows, regressed = rb.compare(res, base, 0.25)
+    assert regressed == ["b"]
+    assert {r[0]: r[3] for r in rows}["c"] == "new" and {r[0]: r[1] for r in rows}["d"] == "skipped"
+
+def test_save_keeps_entries_that_were_not_run(tmp_path, capsys):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"results": {"other": {"us_per_op": 1.0}}}))
+    assert rb.main(["-k", "guardian.sign_packet", "--save", "--min-time", "0.01", "--repeats", "2", "--baseline", str(path)]) == 0
+    saved = json.loads(path.read_text())["results"]
+    assert set(saved) == {"other", "guardian.sign_packet"}
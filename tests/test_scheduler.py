@@ -0,0 +1,26 @@
+import time, threading
+from modules.scheduler import Scheduler
+
+def test_periodic_once_and_cancel(until):
+    s = Scheduler(workers=2); runs = []; fired = threading.Event()
+    job = s.every("tick", lambda: runs.append(1), 0.01, first=0)
+    s.once("one", fired.set, 0.02)
+    assert until(lambda: len(runs) >= 3) and fired.wait(1) and "one" not in s.jobs
+    job.cancel(); n = len(runs); time.sleep(0.05)
+    assert len(runs) <= n + 1 and "tick" not in s.jobs
+    s.shutdown()
+
+def test_rate_mode_skips_overlapping_slots():
+    s = Scheduler(workers=4); busy = []
+    def slow(): busy.append(1); time.sleep(0.06)
+    job = s.every("slow", slow, 0.01, mode="rate", first=0)
+    time.sleep(0.2); job.cancel(); s.shutdown()
+    assert job.stats["skipped"] > 0 and job.running <= 1 and len(busy) < 10
+
+def test_failing_job_keeps_running(until):
+    s = Scheduler(workers=1); calls = []
+    def bad(): calls.append(1); raise ValueError("x")
+    job = s.every("bad", bad, 0.01, first=0)
+    assert until(lambda: len(calls) >= 2)
+    job.cancel(); s.shutdown()
+    assert job.stats["errors"] >= 2 and job.stats["last_error"] == "ValueError: x"
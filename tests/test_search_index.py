@@ -0,0 +1,52 @@
+import modules.search_index as si
+from modules.memory_store import MemoryStore
+
+def _index(tmp_path):
+    return si.SearchIndex(MemoryStore(str(tmp_path / "m.db")))
+
+def test_stopword_only_overlap_is_not_a_hit(tmp_path):
+    idx = _index(tmp_path)
+    idx.add("skill", "graph theory", "graph theory is the study of graphs and the edges between them")
+    idx.add("skill", "cybernetics", "cybernetics is the science of control and communication")
+    assert idx.search("What is the capital of France?", kinds=("skill", "tutor", "long_term"), limit=1) == []
+    hit = idx.search("what is graph theory?", kinds=("skill",), limit=1)
+    assert hit and hit[0]["ref"] == "graph theory"
+
+def test_most_terms_must_match(tmp_path):
+    idx = _index(tmp_path)
+    idx.add("tutor", "q", "paris is the capital city of france")
+    assert idx.search("capital of france", kinds=("tutor",))
+    assert idx.search("capital of germany", kinds=("tutor",)) == []
+
+def test_min_score_cutoff(tmp_path):
+    idx = _index(tmp_path)
+    idx.add("tutor", "q", "paris capital france")
+    assert idx.search("paris capital", kinds=("tutor",), min_score=1e9) == []
+
+def test_expire_drops_old_tutor_docs_only(tmp_path):
+    idx = _index(tmp_path)
+    idx.add("tutor", "q", "old tutor answer"); idx.add("skill", "s", "old skill answer")
+    assert idx.expire("9999") == 1
+    assert [h["kind"] for h in idx.search("old answer")] == ["skill"]
+
+def test_legacy_doc_table_is_migrated(tmp_path):
+    m = MemoryStore(str(tmp_path / "m.db"))
+    c = m.connection()
+    c.execute("CREATE VIRTUAL TABLE doc_fts USING fts5(kind UNINDEXED, ref UNINDEXED, body, tokenize='porter unicode61')")
+    c.execute("INSERT INTO doc_fts VALUES ('tutor','q','legacy tutor text')"); c.commit()
+    idx = si.SearchIndex(m)
+    assert idx.search("legacy tutor")[0]["text"] == "legacy tutor text"
+
+def test_without_fts5_index_is_disabled_not_fatal(tmp_path, monkeypatch):
+    monkeypatch.setattr(si, "DOC_DDL", "CREATE VIRTUAL TABLE IF NOT EXISTS doc_fts USING no_such_module(body)")
+    idx = _index(tmp_path)
+    assert idx.fts is False
+    idx.add("tutor", "q", "text")
+    assert idx.search("text", kinds=("tutor",)) == []
+
+def test_evicted_skills_leave_the_index(tmp_path):
+    from modules.tiny_skill_memory import SkillStore
+    idx = _index(tmp_path); st = SkillStore(str(tmp_path / "s.jsonl"), legacy_path=None, max_per_concept=1)
+    idx.attach_skills(st)
+    st.add("zebra", "zebras have stripes", 0.5); st.add("zebra", "zebras gallop fast", 0.5)
+    assert [h["text"] for h in idx.search("zebras", kinds=("skill",))] == ["zebra zebras gallop fast"]
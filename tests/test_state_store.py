@@ -0,0 +1,23 @@
+import time, threading
+from modules.state_store import StateStore
+
+def test_snapshots_are_versioned_and_immutable():
+    st = StateStore({"rho": 0.8})
+    s0 = st.snapshot()
+    assert st.update(rho=0.8) == set() and st.version == 0
+    assert st.update({"rho": 0.5}, chi=0.1) == {"rho", "chi"}
+    assert s0["rho"] == 0.8 and st["rho"] == 0.5 and st.version == 1
+
+def test_subscribers_get_coalesced_keys():
+    st = StateStore({}); got = []; done = threading.Event()
+    def fn(keys, snap): got.append((set(keys), snap["b"])); done.set()
+    st.subscribe(fn, keys=("a", "b"), coalesce=0.05)
+    st.update(a=1); st.update(b=2); st.update(c=3)
+    assert done.wait(1); time.sleep(0.05)
+    assert got == [({"a", "b"}, 2)]
+
+def test_unsubscribe_stops_notifications():
+    st = StateStore({}); got = []
+    off = st.subscribe(lambda k, s: got.append(k))
+    off(); st.update(x=1); time.sleep(0.05)
+    assert got == []
@@ -0,0 +1,29 @@
+import json
+from modules.tiny_skill_memory import SkillStore
+
+def test_ranked_per_concept_and_reloaded(tmp_path):
+    p = str(tmp_path / "s.jsonl")
+    st = SkillStore(p, legacy_path=None, max_per_concept=2)
+    for rule, score in (("a", 0.1), ("b", 0.9), ("c", 0.5)): st.add("Greet  User", rule, score)
+    assert [r["rule"] for r in st.query("greet user")] == ["b", "c"]
+    with open(p, "a") as f: f.write('{"concept": "torn')  # crashed writer
+    assert [r["rule"] for r in SkillStore(p, legacy_path=None, max_per_concept=2).query("GREET user")] == ["b", "c"]
+
+def test_migrates_legacy_file_and_compacts(tmp_path):
+    legacy = tmp_path / "skills.json"; p = str(tmp_path / "s.jsonl")
+    legacy.write_text(json.dumps([{"concept": "x", "rule": "old", "score": 1}]))
+    st = SkillStore(p, legacy_path=str(legacy), max_per_concept=1)
+    assert st.best("x")["rule"] == "old" and (tmp_path / "skills.json.migrated").exists()
+    for i in range(100): st.add("x", f"r{i}", 0)
+    assert len(open(p).readlines()) < 100 and st.best("x")["rule"] == "old"
+
+def test_equal_scores_keep_newest(tmp_path):
+    p = str(tmp_path / "s.jsonl"); seen = []
+    st = SkillStore(p, legacy_path=None, max_per_concept=20); st.listeners.append(lambda e, r: seen.append((e, r["rule"])))
+    for i in range(25): st.add("topic", f"rule v{i}", 0.5)
+    assert st.best("topic")["rule"] == "rule v24" and ("evict", "rule v0") in seen
+    st.compact()
+    assert [r["rule"] for r in SkillStore(p, legacy_path=None, max_per_concept=20).query("topic")][:2] == ["rule v24", "rule v23"]
+    seen.clear(); full = SkillStore(str(tmp_path / "f.jsonl"), legacy_path=None, max_per_concept=1)
+    full.add("x", "good", 0.9); full.listeners.append(lambda e, r: seen.append(e))
+    assert full.add("x", "worse", 0.1) is None and not seen and len(open(tmp_path / "f.jsonl").readlines()) == 1
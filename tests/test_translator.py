@@ -0,0 +1,27 @@
+from modules.translator import Translator
+
+class _Engine:
+    def __init__(self): self.calls = []
+    def __call__(self, texts, lang, src):
+        self.calls.append(list(texts)); return [f"[{lang}]{t}" for t in texts]
+
+def test_batches_only_unseen_strings():
+    eng = _Engine(); tr = Translator(eng)
+    assert tr.translate_many(["hi", "2+2", "hi", "bye"], "pl") == ["[pl]hi", "2+2", "[pl]hi", "[pl]bye"]
+    assert tr.translate_many(["bye", "new"], "pl") == ["[pl]bye", "[pl]new"]
+    assert eng.calls == [["hi", "bye"], ["new"]]
+    assert tr.translate("hi", "en", src="en") == "hi" and len(eng.calls) == 2
+
+def test_disk_cache_survives_restart(tmp_path):
+    p = str(tmp_path / "t.db")
+    Translator(_Engine(), path=p).translate_doc("one\n\ntwo", "de")
+    eng = _Engine(); tr = Translator(eng, path=p)
+    assert tr.translate_doc("one\n\ntwo\n\nthree", "de") == "[de]one\n\n[de]two\n\n[de]three"
+    assert eng.calls == [["three"]] and tr.stats["disk"] == 2
+
+def test_engine_failure_returns_original_unmemoized():
+    def broken(texts, lang, src): raise IOError("down")
+    tr = Translator(broken)
+    assert tr.translate("hello", "fr") == "hello"
+    tr.engine = _Engine()
+    assert tr.translate("hello", "fr") == "[fr]hello"
@@ -0,0 +1,28 @@
+import time, threading
+from modules.web_cache import WebCache
+
+def test_fresh_stale_and_offline(tmp_path, monkeypatch):
+    c = WebCache(str(tmp_path / "w.db"), ttl=10)
+    calls = []
+    fn = lambda q: calls.append(q) or {"text": q}
+    assert c.fetch("Hello  World", fn) == {"text": "Hello  World"}
+    assert c.fetch("hello world", fn) == {"text": "Hello  World"} and len(calls) == 1
+    now = time.time(); monkeypatch.setattr(time, "time", lambda: now + 60)
+    assert c.fetch("hello world", fn, offline=True) == {"text": "Hello  World"}  # stale copy
+    assert c.fetch("hello world", lambda q: None) == {"text": "Hello  World"}    # refetch failed
+    assert c.fetch("unknown", fn, offline=True) is None and c.stats["stale"] == 2
+
+def test_concurrent_misses_share_one_fetch(tmp_path):
+    c = WebCache(str(tmp_path / "w.db")); gate = threading.Event(); calls = []
+    def slow(q): calls.append(q); gate.wait(2); return {"q": q}
+    out = []
+    ts = [threading.Thread(target=lambda: out.append(c.fetch("x", slow))) for _ in range(5)]
+    for t in ts: t.start()
+    time.sleep(0.05); gate.set()
+    for t in ts: t.join(2)
+    assert calls == ["x"] and out == [{"q": "x"}] * 5
+
+def test_lru_eviction_keeps_the_table_bounded(tmp_path):
+    c = WebCache(str(tmp_path / "w.db"), max_entries=20)
+    for i in range(100): c.put(f"q{i}", i)
+    assert len(c) <= 20 and c.get("q99") == 99 and c.get("q0") is None